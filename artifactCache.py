@@ -0,0 +1,115 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+
+class ArtifactCache:
+    def __init__(self, root: str = ".cache/artifacts", max_bytes: int = 5 * 1024 ** 3):
+        """
+        Content-addressed on-disk cache for pipeline artifacts.
+
+        Entries are addressed by a hash of the inputs that produced them, so a
+        re-run of a failed job finds every finished stage and resumes at the
+        first one that is missing. Reads refresh an entry's mtime and the
+        least recently used entries are evicted once the cache exceeds max_bytes.
+
+        Args:
+            root (str): Cache directory.
+            max_bytes (int): Size bound for all entries together.
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+        self._file_hashes = {}
+        os.makedirs(self.root, exist_ok=True)
+
+    def key(self, stage: str, *parts) -> str:
+        """Return the cache key for a stage and the values that determine its output."""
+        payload = json.dumps([stage, parts], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def file_hash(self, path: str) -> str:
+        """SHA-256 of a file's contents, remembered per (path, mtime, size)."""
+        stat = os.stat(path)
+        memo_key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+        if memo_key not in self._file_hashes:
+            digest = hashlib.sha256()
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+            self._file_hashes[memo_key] = digest.hexdigest()
+        return self._file_hashes[memo_key]
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.root, key[:2], key + suffix)
+
+    def get(self, key: str, suffix: str = "") -> str | None:
+        """Return the path of a cached file, or None on a miss."""
+        path = self._path(key, suffix)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key: str, src: str, suffix: str = "") -> str:
+        """Copy src into the cache under key and return the cached path."""
+        path = self._path(key, suffix)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+        os.close(fd)
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, path)
+        self.evict()
+        return path
+
+    def fetch(self, key: str, dest: str, suffix: str = "") -> bool:
+        """Copy a cached file to dest. Returns False on a miss."""
+        path = self.get(key, suffix)
+        if path is None:
+            return False
+        shutil.copyfile(path, dest)
+        return True
+
+    def get_json(self, key: str):
+        """Return a cached JSON value, or None on a miss."""
+        path = self.get(key, ".json")
+        if path is None:
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def put_json(self, key: str, value):
+        """Store a JSON-serialisable value under key."""
+        path = self._path(key, ".json")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(value, f)
+        os.replace(tmp, path)
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        entries, total = [], 0
+        for folder, _, names in os.walk(self.root):
+            for name in names:
+                if name.endswith(".part"):
+                    continue
+                path = os.path.join(folder, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue  # removed by another worker
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                print(f"Evicted cached artifact {path}")
+            except FileNotFoundError:
+                pass
+            total -= size
@@ -0,0 +1,663 @@
+from geminiClient import GeminiClient, LocalGeminiClient, parse_stories
+from jobWorkspace import JobWorkspace
+from artifactCache import ArtifactCache
+from templateLibrary import TemplateLibrary
+from stageScheduler import StageScheduler
+from storyBuffer import StoryBuffer
+from storyIndex import StoryIndex
+from durationEstimator import DurationEstimator
+from uploadService import UploadService, QuotaTracker
+from profiler import Profiler, stage
+from renderProfiles import get_profile
+from transcription import register_transcriber, transcriber_config
+from modelRegistry import shared_registry
+from fileLock import file_lock
+from config import (
+    audioOutputFileName, finalOutputFileName, redditTemplateVideos,
+    subreddits, tags, descriptions, playlistIds
+)
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+from datetime import datetime
+
+import os
+import json
+import time
+import tempfile
+import random
+import threading
+import subprocess
+import multiprocessing
+
+
+def new_job(subreddit: str | None = None, template: str | None = None, job_id: str | None = None, root: str = "jobs") -> dict:
+    """
+    Create a job with its own workspace, picking a random subreddit/template when not given.
+    The job is saved as job.json in its workspace; asking for an existing job_id
+    loads that job back so it can be resumed.
+    """
+    workspace = JobWorkspace(root, job_id)
+    job_file = workspace.file("job.json")
+    if os.path.exists(job_file):
+        with open(job_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    job = {
+        "id": workspace.job_id,
+        "workdir": workspace.path,
+        "subreddit": subreddit or random.choice(subreddits),
+        "template": template or random.choice(redditTemplateVideos),
+        "audio": workspace.file(audioOutputFileName),
+        "video": workspace.file(finalOutputFileName),
+    }
+    save_job(job)
+    return job
+
+
+def save_job(job: dict):
+    """Write the job, with everything its finished stages added to it, back to its job.json."""
+    with open(os.path.join(job["workdir"], "job.json"), "w", encoding="utf-8") as f:
+        json.dump(job, f, indent=2)
+
+
+# what each single-stage command needs from the stages before it
+STAGE_INPUTS = {
+    "story": (),
+    "synthesize": ("question", "story"),
+    "render": ("question", "story", "audio_duration"),
+    "upload": ("question",),
+}
+
+
+# remove_from_queue is called from several upload threads at once
+_queue_lock = threading.Lock()
+
+
+def _write_queue(queue_file: str, lines: list):
+    """Replace the queue file in one step, so a reader never sees it truncated."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(queue_file)), suffix=".part")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.writelines(line + "\n" for line in lines)
+    os.replace(tmp, queue_file)
+
+
+def read_queue(queue_file: str) -> list:
+    """
+    Read a local queue file of JSON lines, e.g. {"subreddit": "true crime"}.
+    Every key is optional; "id" pins the job's workspace. Entries without an
+    id are given one and the file is rewritten, so a failed entry resumes the
+    same job next time. Returns jobs that remember their queue line in "queue_entry".
+    """
+    jobs = []
+    with _queue_lock, file_lock(queue_file):
+        with open(queue_file, "r", encoding="utf-8") as f:
+            lines = [line.strip() for line in f if line.strip()]
+        for line in lines:
+            spec = json.loads(line)
+            job = new_job(spec.get("subreddit"), spec.get("template"), spec.get("id"))
+            spec["id"] = job["id"]
+            job["queue_entry"] = json.dumps(spec)
+            jobs.append(job)
+        _write_queue(queue_file, [job["queue_entry"] for job in jobs])
+    return jobs
+
+
+def remove_from_queue(queue_file: str, entry: str):
+    """
+    Drop one finished entry from the queue file. Safe to call from several
+    threads or processes at once: the read and rewrite happen under a lock.
+    """
+    with _queue_lock, file_lock(queue_file):
+        with open(queue_file, "r", encoding="utf-8") as f:
+            lines = [line.strip() for line in f if line.strip()]
+        if entry in lines:
+            lines.remove(entry)
+        _write_queue(queue_file, lines)
+
+
+class BatchWorker:
+    def __init__(
+        self,
+        voice_sample: str = "voiceSample2.wav",
+        exaggeration: float = 0.6,
+        cfg_weight: float = 0.3,
+        speed: float = 1.0,
+        whisper_model: str | None = None,
+        align_captions: bool = True,
+        upload: bool = True,
+        cache_dir: str = ".cache/artifacts",
+        cache_size_gb: float = 5.0,
+        tts_workers: int = 1,
+        stream_audio: bool = True,
+        offline: bool = False,
+        story_batch: int = 0,
+        dedupe: bool = True,
+        max_seconds: float | None = None,
+        upload_concurrency: int = 2,
+        profile_log: str = ".cache/profile.jsonl",
+        trace_dir: str | None = None,
+        render_profile: str | None = None,
+        caption_backend: str | None = None,
+        tts_threads: int | None = None,
+        tts_quantize: bool = False,
+        tts_compile: bool = False,
+        model_budget_mb: float | None = None,
+        question_seconds: float | None = None
+    ):
+        """
+        Long-lived worker that runs as many jobs as it is given. ChatterboxTTS
+        and the caption model (forced aligner or Whisper) are loaded on first use
+        and stay resident between jobs, unless model_budget_mb makes room by
+        evicting the one used least recently.
+
+        Args:
+            voice_sample (str): Reference WAV used for voice cloning.
+            exaggeration (float): Emotion/intensity control for TTS.
+            cfg_weight (float): Pacing/expressiveness control for TTS.
+            speed (float): Pitch-preserving playback speed of the narration.
+            whisper_model (str, optional): Model size of the caption transcriber
+                (CAPTION_MODEL, else "base").
+            align_captions (bool): Time captions by aligning the known story to the
+                narration instead of transcribing it with Whisper.
+            upload (bool): Upload finished videos to YouTube.
+            cache_dir (str): Artifact cache that lets a re-run job skip finished stages.
+            cache_size_gb (float): Size bound of the artifact cache.
+            tts_workers (int): CPU processes generating story chunks in parallel.
+            stream_audio (bool): Encode each chunk as it is generated and align its
+                captions alongside synthesis (needs align_captions).
+            offline (bool): Use local stand-ins for Gemini and YouTube.
+            story_batch (int): When > 0, fetch this many stories per Gemini request
+                into a local buffer that jobs draw from.
+            dedupe (bool): Reject stories that are near-duplicates of earlier ones
+                before any TTS or render work is spent on them.
+            max_seconds (float, optional): Cut stories at a sentence boundary so the
+                predicted narration stays within this many seconds.
+            upload_concurrency (int): Videos uploading at the same time.
+            profile_log (str): JSON-lines file every job's per-stage timings are appended to.
+            trace_dir (str, optional): Also write a Chrome trace per job into this folder.
+            render_profile (str, optional): Encoder profile (draft/fast/balanced/publish);
+                defaults to the one autotune picked for this host.
+            caption_backend (str, optional): Transcriber used when captions are not
+                aligned: "whisper" or "faster-whisper" (CAPTION_BACKEND, else "whisper").
+            tts_threads (int, optional): Torch intra-op threads of TTS generation.
+            tts_quantize (bool): Run the TTS transformer with int8 dynamic quantization (CPU).
+            tts_compile (bool): torch.compile the TTS transformer.
+            model_budget_mb (float, optional): RSS budget of this worker in MB
+                (MODEL_RSS_BUDGET_MB); None keeps every model resident.
+            question_seconds (float, optional): Show the question card for the first
+                this many seconds; None keeps it up for the whole video.
+        """
+        load_dotenv()
+        self.profile_log = profile_log
+        self.trace_dir = trace_dir
+        self.profilers = {}  # job id -> Profiler of the running job
+        self._profilers_lock = threading.Lock()
+
+        if offline:
+            self.gemini = LocalGeminiClient()
+            self.prompt = os.getenv("GEMINI_QUESTION_PROMPT") or "{subreddit}"
+        else:
+            self.gemini = GeminiClient(os.getenv("GEMINI_API_KEY"))
+            self.prompt = os.getenv("GEMINI_QUESTION_PROMPT")
+        self.story_index = StoryIndex() if dedupe else None
+        self.story_attempts = 3
+        self.stories = StoryBuffer(self.gemini, self.prompt, batch_size=story_batch, index=self.story_index) if story_batch > 0 else None
+        self.speed = speed
+        self.max_seconds = max_seconds
+        # narration length is predicted from past runs of the same voice settings
+        self.durations = DurationEstimator()
+        self.voice_key = f"{os.path.basename(voice_sample)}|{exaggeration}|{cfg_weight}"
+        self.upload_enabled = upload
+        self.upload_concurrency = upload_concurrency
+        self.offline = offline
+        self.upload_service = None  # authenticated on the first upload
+        self._upload_service_lock = threading.Lock()
+        self.stream_audio = stream_audio
+        self.cache = ArtifactCache(cache_dir, int(cache_size_gb * 1024 ** 3))
+        self.render_profile = get_profile(render_profile)
+        self.question_seconds = question_seconds
+        # index the template videos in the background while the models load
+        self.templates = TemplateLibrary()
+        self.templates.warm([t for t in redditTemplateVideos if os.path.exists(t)])
+
+        # models load when a stage first needs them, so a resumed job with a cached
+        # narration never loads TTS, and are shared with anything else in the process
+        self.voice_sample = voice_sample
+        self.exaggeration = exaggeration
+        self.cfg_weight = cfg_weight
+        self.models = shared_registry(model_budget_mb)
+        self.tts_model = f"tts:{self.voice_key}|{tts_quantize}|{tts_compile}"
+
+        def load_tts():
+            from textToSpeech import TextToSpeech  # torch and chatterbox are imported with the model
+            return TextToSpeech(
+                voice_sample=voice_sample,
+                exaggeration=exaggeration,
+                cfg_weight=cfg_weight,
+                cache=self.cache,
+                workers=tts_workers,
+                threads=tts_threads,
+                quantize=tts_quantize,
+                compile_model=tts_compile,
+                warmup=True
+            )
+
+        def load_aligner():
+            from captionAligner import ForcedAligner
+            return ForcedAligner()
+
+        self.models.register(self.tts_model, load_tts)
+        self.align_captions = align_captions
+        if align_captions:
+            self.caption_model = "aligner"
+            self.transcriber_config = None
+            self.models.register(self.caption_model, load_aligner)
+        else:
+            self.transcriber_config = transcriber_config(caption_backend, whisper_model)
+            self.caption_model = register_transcriber(self.models, *self.transcriber_config)
+
+    def generate_story(self, job: dict):
+        key = self.cache.key("story", self.prompt, job["subreddit"], job["id"])
+        cached = self.cache.get_json(key)
+        if cached:
+            print("Reusing cached story")
+            job["question"], job["story"] = cached["question"], cached["story"]
+            return
+
+        for _ in range(self.story_attempts):
+            question, story = self._next_story(job["subreddit"])
+            if self.story_index is None or self.story_index.check_and_add(job["subreddit"], question, story):
+                break
+            print(f"Rejected near-duplicate story: {question}")
+        else:
+            raise RuntimeError(f"Only got near-duplicate stories after {self.story_attempts} attempts")
+
+        job["question"], job["story"] = question, story
+        print("redditQuestion: ", job["question"])
+        print("story: ", job["story"])
+        self.cache.put_json(key, {"question": job["question"], "story": job["story"]})
+
+    def _next_story(self, subreddit: str) -> tuple:
+        """Return a (question, story) from the buffer, or from a single Gemini request."""
+        if self.stories is not None:
+            with stage("gemini", buffered=True):
+                return self.stories.pop(subreddit)
+        question = self.prompt.replace("{subreddit}", subreddit)
+        with stage("gemini"):
+            answer = self.gemini.query(question)
+        stories = parse_stories(answer)
+        if not stories:
+            raise ValueError("Gemini answer did not contain a ~question~story pair")
+        return stories[0]
+
+    def _template_duration(self, path: str) -> float:
+        """Length of a template in seconds; 0 for one that is missing or that ffprobe cannot read."""
+        try:
+            return self.templates.get(path)["duration"]
+        except (OSError, subprocess.CalledProcessError, KeyError, IndexError, ValueError) as e:
+            print(f"Could not probe template {path}: {e}")
+            return 0.0
+
+    def fit_to_template(self, job: dict, margin: float = 1.1):
+        """
+        Predict the narration length before any audio is generated and make the
+        job fit: cut the story down to max_seconds, then swap in a template that
+        is long enough. When none is, the renderer loops the template instead.
+
+        The outcome is saved in the job's job.json. A resumed job reuses it
+        rather than fitting again with a duration history that has changed
+        since, which could cut the story differently and miss the cached
+        narration. A story edited since the fit is fitted again.
+        """
+        key = self.cache.key("fit", job["story"], self.max_seconds, self.speed, self.voice_key, margin)
+        fit = job.get("fit")
+        if fit and (fit["key"] == key or fit["story"] == job["story"]):
+            job["story"], job["template"] = fit["story"], fit["template"]
+            job["estimated_duration"] = fit["estimated_duration"]
+            return
+
+        estimate = self.durations.estimate(job["story"], self.speed, self.voice_key)
+        if self.max_seconds and estimate > self.max_seconds:
+            job["story"] = self.durations.fit_text(job["story"], self.max_seconds, self.speed, self.voice_key)
+            print(f"Story predicted at {estimate:.1f}s, cut to fit {self.max_seconds:.0f}s")
+            estimate = self.durations.estimate(job["story"], self.speed, self.voice_key)
+        job["estimated_duration"] = estimate
+
+        needed = estimate * margin  # leave room for the estimate being short
+        if self._template_duration(job["template"]) < needed:
+            longer = sorted(t for t in redditTemplateVideos if os.path.exists(t) and self._template_duration(t) >= needed)
+            if longer:
+                # seeded by the job id so a resumed job picks the same template
+                job["template"] = random.Random(job["id"]).choice(longer)
+                print(f"Narration predicted at {estimate:.1f}s, switched to template {job['template']}")
+            else:
+                print(f"Narration predicted at {estimate:.1f}s, longer than every template; the footage will loop")
+
+        job["fit"] = {"key": key, "story": job["story"], "template": job["template"], "estimated_duration": estimate}
+        save_job(job)
+
+    def synthesize(self, job: dict):
+        self.fit_to_template(job)
+        key = self.cache.key(
+            "audio", job["story"], self.cache.file_hash(self.voice_sample),
+            self.exaggeration, self.cfg_weight, self.speed
+        )
+        suffix = os.path.splitext(job["audio"])[1]
+        if self.cache.fetch(key, job["audio"], suffix):
+            print("Reusing cached narration")
+            job["audio_duration"] = (self.cache.get_json(key) or {}).get("duration")
+            return
+        max_len = self.durations.plan_max_len(job["story"], self.voice_key)
+        with self.models.use(self.tts_model) as tts:
+            if self.stream_audio and self.align_captions:
+                with self.models.use(self.caption_model) as aligner:
+                    job["audio_duration"] = self._synthesize_streaming(job, tts, aligner, max_len)
+            else:
+                job["audio_duration"] = tts.synthesize(job["story"], job["audio"], speed=self.speed, max_len=max_len)
+        self.durations.record(self.voice_key, job["story"], self.speed, job["audio_duration"])
+        self.cache.put(key, job["audio"], suffix)
+        self.cache.put_json(key, {"duration": job["audio_duration"]})
+
+    def _synthesize_streaming(self, job: dict, tts, aligner, max_len: int = 700) -> float:
+        """
+        Stream chunks into the encoder and align each chunk's captions on a
+        side thread while the next chunk is generated, so captioning overlaps
+        synthesis. The word timings are cached for the render stage. Returns
+        the narration length in seconds.
+        """
+        futures = []
+        with ThreadPoolExecutor(max_workers=1) as align_pool:
+            def on_chunk(text, wav, sr, offset):
+                futures.append(align_pool.submit(aligner.align, wav, text, sr, offset))
+
+            duration = tts.synthesize_stream(
+                job["story"], job["audio"], speed=self.speed, on_chunk=on_chunk, max_len=max_len
+            )
+
+            try:
+                words = [word for future in futures for word in future.result()]
+            except Exception as e:
+                print(f"Per-chunk alignment failed ({e}), captions will be aligned at render time")
+                return duration
+
+        # alignment ran on the un-sped chunks; atempo scales the timeline uniformly
+        for word in words:
+            word["start"] /= self.speed
+            word["end"] /= self.speed
+        self.cache.put_json(self._words_key(job), [words])
+        return duration
+
+    def _words_key(self, job: dict) -> str:
+        if self.align_captions:
+            return self.cache.key("words", self.cache.file_hash(job["audio"]), job["story"])
+        backend = ":".join(self.transcriber_config)
+        return self.cache.key("words", self.cache.file_hash(job["audio"]), None, backend)
+
+    def render(self, job: dict):
+        audio_hash = self.cache.file_hash(job["audio"])
+        words_key = self._words_key(job)
+        words = self.cache.get_json(words_key)
+
+        if words is not None:
+            print("Reusing cached word timings")
+            processor = self._processor(job, words)
+            processor.generate_captions()
+        else:
+            # the caption model is only held while captioning, not through the encode
+            with self.models.use(self.caption_model) as model:
+                processor = self._processor(job, words, model)
+                processor.generate_captions()
+            self.cache.put_json(words_key, processor.words)
+
+        template = os.stat(job["template"])
+        render_key = self.cache.key(
+            "render", job["template"], template.st_size, template.st_mtime_ns,
+            audio_hash, processor.words, job["question"], job["id"], self.render_profile.to_dict(),
+            self.question_seconds
+        )
+        if self.cache.fetch(render_key, job["video"], ".mp4"):
+            print("Reusing cached render")
+            return
+        processor.render(random_start=True, seed=job["id"])
+        processor.cleanup()
+        self.cache.put(render_key, job["video"], ".mp4")
+
+    def _processor(self, job: dict, words: list | None, caption_model=None):
+        from videoGenerator import VideoProcessor
+        from questionCard import QuestionCard
+        return VideoProcessor(
+            job["template"], job["audio"], job["video"], job["question"],
+            transcriber=None if self.align_captions else caption_model,
+            work_dir=job["workdir"], script=job["story"],
+            aligner=caption_model if self.align_captions else None, words=words,
+            templates=self.templates, audio_duration=job.get("audio_duration"),
+            loop_template=True,  # never fail this late on an under-estimated narration
+            profile=self.render_profile,
+            question_cards=QuestionCard(self.cache),  # drawn once per question, kept with the other artifacts
+            question_seconds=self.question_seconds
+        )
+
+    def _uploads(self) -> UploadService:
+        with self._upload_service_lock:
+            if self.upload_service is None:
+                # local "uploads" cost no real quota
+                # the Google API clients are only imported once something is uploaded
+                from youtubeUploader import YouTubeUploader, LocalYouTubeUploader
+                uploader_class = LocalYouTubeUploader if self.offline else YouTubeUploader
+                quota = QuotaTracker(10 ** 9, ".cache/localQuota.json") if self.offline else QuotaTracker()
+                self.upload_service = UploadService(
+                    uploader_class(env_file = ".env", video_file = ""), self.upload_concurrency, quota
+                )
+            return self.upload_service
+
+    def upload(self, job: dict) -> bool:
+        """Upload the finished video. Returns False when uploading is disabled."""
+        if not self.upload_enabled:
+            print(f"Upload disabled, video kept at {job['video']}")
+            return False
+        key = self.cache.key("upload", job["id"], self.cache.file_hash(job["video"]))
+        if self.cache.get_json(key):
+            print("Video was already uploaded")
+            return True
+
+        subreddit = job["subreddit"]
+        response = self._uploads().upload(
+            job["video"],
+            title = job["question"] + " #" + str(random.randint(0, 999)),
+            description = descriptions[subreddit],
+            tags = tags[subreddit],
+            category_id = "22",
+            privacy_status = "public",
+            playlist_id = playlistIds[subreddit]
+        )
+        if response:
+            print(f"Video uploaded with ID: {response.get('id')}")
+            self.cache.put_json(key, {"id": response.get("id")})
+        return True
+
+    def _profiler(self, job: dict) -> Profiler:
+        with self._profilers_lock:
+            if job["id"] not in self.profilers:
+                self.profilers[job["id"]] = Profiler(job["id"], self.profile_log, self.trace_dir)
+            return self.profilers[job["id"]]
+
+    def _run_stage(self, name: str, fn, job: dict):
+        """Run one stage of job, recording it (and the steps inside it) in the job's profile."""
+        profiler = self._profiler(job)
+        with profiler.activate(), profiler.stage(name):
+            return fn(job)
+
+    def _write_profile(self, job: dict, status: str = "ok"):
+        with self._profilers_lock:
+            profiler = self.profilers.pop(job["id"], None)
+        if profiler is not None:
+            profiler.write(status)
+
+    def _finish(self, job: dict, uploaded: bool):
+        """Clean up a finished job's workspace and log its run time and profile."""
+        self._write_profile(job)
+        JobWorkspace(os.path.dirname(job["workdir"]), job["id"]).cleanup(keep=() if uploaded else (job["video"],))
+
+        endTime = time.time()
+        startTime = job.get("started", endTime)
+        print(f"Execution time: {endTime - startTime} seconds")
+        now = datetime.now()
+        formatted = now.strftime("%Y-%m-%d %H:%M:%S")
+        with open("lastExecuted.txt", "a", encoding="utf-8") as f:
+            print(f"Last Executed to Completion: {formatted}, Execution Time: {endTime - startTime} seconds", file=f)
+
+    def run_job(self, job: dict):
+        """
+        Run every stage of a single job in order. On success the workspace is
+        cleaned up (the video is kept if it was not uploaded); a failed job
+        keeps its workspace for inspection.
+        """
+        job["started"] = time.time()
+        try:
+            self._run_stage("story", self.generate_story, job)
+            self._run_stage("tts", self.synthesize, job)
+            self._run_stage("render", self.render, job)
+            uploaded = self._run_stage("upload", self.upload, job)
+        except Exception:
+            self._write_profile(job, "failed")
+            raise
+        self._finish(job, uploaded)
+
+    def run_stage(self, name: str, job: dict):
+        """
+        Run a single stage ("story", "synthesize", "render" or "upload") of job
+        on the artifacts earlier stages left in its workspace, then save the job
+        so the next stage can be run the same way.
+        """
+        stages = {
+            "story": ("story", self.generate_story),
+            "synthesize": ("tts", self.synthesize),
+            "render": ("render", self.render),
+            "upload": ("upload", self.upload),
+        }
+        profile_name, fn = stages[name]
+        try:
+            result = self._run_stage(profile_name, fn, job)
+        except Exception:
+            self._write_profile(job, "failed")
+            raise
+        save_job(job)
+        self._write_profile(job)
+        return result
+
+    def run(self, jobs: list, on_success=None) -> int:
+        """
+        Run jobs one after another; each finished video uploads in the background
+        while the next job is produced. A failing job is reported and skipped.
+        A job is finished (workspace cleaned up, profile written, on_success(job)
+        called) as soon as its upload completes. Returns the failure count.
+        """
+        def upload_and_finish(job) -> bool:
+            try:
+                self._finish(job, self._run_stage("upload", self.upload, job))
+            except Exception as e:
+                print(f"Job {job['id']} failed: {e}")
+                self._write_profile(job, "failed")
+                return False
+            if on_success:
+                on_success(job)
+            return True
+
+        failures = 0
+        pending = []
+        with ThreadPoolExecutor(max_workers=self.upload_concurrency) as uploads:
+            for i, job in enumerate(jobs, 1):
+                print(f"=== Job {i}/{len(jobs)} [{job['id']}]: {job['subreddit']} on {job['template']} ===")
+                try:
+                    job["started"] = time.time()
+                    self._run_stage("story", self.generate_story, job)
+                    self._run_stage("tts", self.synthesize, job)
+                    self._run_stage("render", self.render, job)
+                except Exception as e:
+                    failures += 1
+                    print(f"Job {job['id']} failed: {e}")
+                    self._write_profile(job, "failed")
+                    continue
+                pending.append(uploads.submit(upload_and_finish, job))
+
+            failures += sum(not future.result() for future in pending)
+        print(f"Batch finished: {len(jobs) - failures} succeeded, {failures} failed")
+        return failures
+
+
+    def run_pipelined(
+        self,
+        jobs: list,
+        on_success=None,
+        story_workers: int = 2,
+        render_workers: int = 1,
+        upload_workers: int | None = None,
+        queue_size: int = 2
+    ) -> int:
+        """
+        Run jobs through overlapping stages: each stage (LLM, TTS, render,
+        upload) has its own workers and a bounded queue in front of it, so
+        they work on different jobs at once. TTS has a single worker because
+        the model is shared. Returns the failure count.
+        """
+        def start_story(job):
+            job["started"] = time.time()
+            self._run_stage("story", self.generate_story, job)
+
+        def upload_and_finish(job):
+            self._finish(job, self._run_stage("upload", self.upload, job))
+
+        scheduler = StageScheduler([
+            ("story", start_story, story_workers),
+            ("tts", lambda job: self._run_stage("tts", self.synthesize, job), 1),
+            ("render", lambda job: self._run_stage("render", self.render, job), render_workers),
+            ("upload", upload_and_finish, upload_workers or self.upload_concurrency),
+        ], queue_size=queue_size)
+        return scheduler.run(
+            jobs, on_success=on_success,
+            on_failure=lambda job, name, e: self._write_profile(job, f"failed in {name}")
+        )
+
+
+# --- process pool: one BatchWorker (and one copy of the models) per process ---
+_pool_worker = None
+
+def _init_pool_worker(worker_kwargs: dict, threads: int):
+    global _pool_worker
+    import torch
+    # keep N workers from oversubscribing the cores between them
+    worker_kwargs = {**worker_kwargs, "tts_threads": worker_kwargs.get("tts_threads") or threads}
+    torch.set_num_threads(worker_kwargs["tts_threads"])
+    _pool_worker = BatchWorker(**worker_kwargs)
+
+def _run_pool_job(job: dict) -> dict:
+    _pool_worker.run_job(job)
+    return job
+
+def run_pool(jobs: list, concurrency: int, worker_kwargs: dict | None = None, on_success=None) -> int:
+    """
+    Run jobs on a pool of worker processes, each with its own models and
+    per-job workspaces, so several pipelines share the host. Returns the failure count.
+    """
+    threads = max(1, (os.cpu_count() or 1) // concurrency)
+    failures = 0
+    with ProcessPoolExecutor(
+        max_workers=concurrency,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_pool_worker,
+        initargs=(worker_kwargs or {}, threads)
+    ) as pool:
+        futures = {pool.submit(_run_pool_job, job): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                failures += 1
+                print(f"Job {job['id']} failed: {e}")
+                continue
+            print(f"Job {job['id']} finished")
+            if on_success:
+                on_success(job)
+    print(f"Batch finished: {len(jobs) - failures} succeeded, {failures} failed")
+    return failures
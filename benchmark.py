@@ -0,0 +1,323 @@
+import os
+import re
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import platform
+import subprocess
+from videoGenerator import VideoProcessor
+from transcription import load_transcriber
+
+# torch and the TTS stack are imported by the benchmarks that use them, so the
+# render-only helpers (make_fixtures, sample_processor) also work on a host
+# without them, e.g. for 'python renderProfiles.py autotune'
+
+# what main.py must not import until a stage needs it
+_HEAVY_MODULES = ("torch", "torchaudio", "chatterbox", "whisper", "faster_whisper", "googleapiclient", "google.generativeai")
+
+_WORDS = (
+    "so this happened last week when my neighbor knocked on the door and asked "
+    "if I had seen his cat which was strange because he does not own a cat"
+).split()
+
+
+class StubTTSModel:
+    """Stand-in for ChatterboxTTS: a tone whose length follows the text, produced instantly."""
+
+    def __init__(self, sr: int = 24000, seconds_per_char: float = 0.065):
+        self.sr = sr
+        self.seconds_per_char = seconds_per_char
+        self.conds = None
+
+    def generate(self, text: str, exaggeration: float = 0.5, cfg_weight: float = 0.5) -> "torch.Tensor":
+        import torch
+        n = int(len(text) * self.seconds_per_char * self.sr)
+        t = torch.arange(n, dtype=torch.float32) / self.sr
+        return 0.3 * torch.sin(2 * math.pi * 220.0 * t).unsqueeze(0)
+
+    def prepare_conditionals(self, wav_fpath: str, exaggeration: float = 0.5):
+        pass
+
+
+def _ffmpeg(*args):
+    subprocess.run(["ffmpeg", "-v", "error", "-y", *args], check=True)
+
+
+def make_fixtures(folder: str, seconds: float) -> dict:
+    """
+    Generate (once) a vertical testsrc2 background twice as long as the narration,
+    a tone narration, a question card and synthetic word timings for one length.
+    """
+    os.makedirs(folder, exist_ok=True)
+    video = os.path.join(folder, f"background_{seconds:g}s.mp4")
+    audio = os.path.join(folder, f"narration_{seconds:g}s.m4a")
+    card = os.path.join(folder, "questionCard.png")
+    if not os.path.exists(video):
+        _ffmpeg(
+            "-f", "lavfi", "-i", f"testsrc2=size=1080x1920:rate=30:duration={seconds * 2:g}",
+            "-c:v", "libx264", "-preset", "veryfast", "-g", "60", "-pix_fmt", "yuv420p", video
+        )
+    if not os.path.exists(audio):
+        _ffmpeg("-f", "lavfi", "-i", f"sine=frequency=220:duration={seconds:g}", "-c:a", "aac", audio)
+    if not os.path.exists(card):
+        _ffmpeg("-f", "lavfi", "-i", "color=white:size=1080x640", "-frames:v", "1", card)
+    return {"video": video, "audio": audio, "card": card, "words": synthetic_words(seconds)}
+
+
+def synthetic_words(seconds: float, words_per_second: float = 2.7, seed: int = 0) -> list:
+    """Per-segment word timings shaped like the aligner's output, ~10 s per segment."""
+    rng = random.Random(seed)
+    segments, segment = [], []
+    t, step = 0.0, 1.0 / words_per_second
+    while t + step <= seconds:
+        segment.append({"word": rng.choice(_WORDS), "start": t, "end": t + step * 0.9})
+        t += step
+        if len(segment) >= 10 * words_per_second:
+            segments.append(segment)
+            segment = []
+    if segment:
+        segments.append(segment)
+    return segments
+
+
+def sample_processor(fixtures: dict, seconds: float, work_dir: str, profile: str | None = None) -> VideoProcessor:
+    processor = VideoProcessor(
+        fixtures["video"], fixtures["audio"], os.path.join(work_dir, "benchmark.mp4"),
+        "Has anyone else noticed something weird about their neighbor lately?",
+        work_dir=work_dir, words=fixtures["words"], audio_duration=seconds, profile=profile
+    )
+    processor.question_template = fixtures["card"]
+    return processor
+
+
+def _timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def bench_video(fixtures: dict, seconds: float, work_dir: str, profile: str | None = None) -> dict:
+    """Wall seconds of each video stage for one narration length."""
+    timings = {}
+    processor = sample_processor(fixtures, seconds, work_dir, profile)
+    # the processor is handed precomputed word timings, so this is SRT formatting
+    # only; bench_align times the alignment that produces them
+    timings["srt_format"] = _timed(processor.generate_srt_captions)
+    timings["trim"] = _timed(lambda: processor.trim(seed=0))
+    timings["add_text_overlays"] = _timed(processor.add_text_overlays)
+    timings["attach_audio"] = _timed(processor.attach_audio)
+    processor.cleanup()
+
+    processor = sample_processor(fixtures, seconds, work_dir, profile)
+    processor.generate_captions()
+    timings["render"] = _timed(lambda: processor.render(seed=0))
+    processor.cleanup()
+    return timings
+
+
+def bench_align(fixtures: dict, seconds: float, aligner) -> dict:
+    """
+    Wall seconds of forced alignment of a narration of the given length: the
+    fixture's synthetic words aligned to a tone. The timings it finds mean
+    nothing, but the model runs over every window and the CTC search over
+    every token, as with real speech.
+    """
+    import torch
+    sr = aligner.sample_rate
+    t = torch.arange(int(seconds * sr), dtype=torch.float32) / sr
+    tone = 0.3 * torch.sin(2 * math.pi * 220.0 * t)
+    text = " ".join(word["word"] for segment in fixtures["words"] for word in segment)
+    return {"align": _timed(lambda: aligner.align(tone, text, sr))}
+
+
+def bench_tts(seconds: float, work_dir: str, model=None) -> dict:
+    """Wall seconds of TextToSpeech.synthesize for a story of about the given length."""
+    from textToSpeech import TextToSpeech
+    tts = TextToSpeech(device="cpu", model=model or StubTTSModel())
+    sentence = " ".join(_WORDS).capitalize() + ". "
+    text = (sentence * int(seconds))[:int(seconds * 15)]  # speech runs at ~15 characters a second
+    output = os.path.join(work_dir, "benchmark.m4a")
+    return {"synthesize": _timed(lambda: tts.synthesize(text, output))}
+
+
+def bench_transcription(backends: list, speech_file: str, repeat: int, model: str | None = None) -> dict:
+    """Speed of each caption backend on a real speech recording: audio seconds and words per wall second."""
+    seconds = float(subprocess.run(
+        ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "default=noprint_wrappers=1:nokey=1", speech_file],
+        stdout=subprocess.PIPE, check=True
+    ).stdout)
+    results = {}
+    for backend in backends:
+        transcriber = load_transcriber(backend, model)
+        transcriber.transcribe(speech_file)  # warm-up: first call pays for lazy initialization
+        best, words = float("inf"), 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            segments = transcriber.transcribe(speech_file)
+            best = min(best, time.perf_counter() - start)
+            words = sum(len(segment) for segment in segments)
+        results[f"transcribe[{backend}]"] = {"wall_s": best, "throughput": seconds / best, "words_per_s": words / best, "words": words}
+    return results
+
+
+def _normalize(text: str) -> list:
+    return re.sub(r"[^a-z0-9' ]+", " ", text.lower()).split()
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """Word-level Levenshtein distance between the texts over the reference length."""
+    ref, hyp = _normalize(reference), _normalize(hypothesis)
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        current = [i]
+        for j, h in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h)))
+        previous = current
+    return previous[-1] / max(1, len(ref))
+
+
+def bench_tts_quality(work_dir: str, voice_sample: str | None = None, threads: int | None = None, caption_model: str | None = None, seed: int = 0) -> dict:
+    """
+    Synthesize the same sentence with the same seed on the real model, first in
+    fp32 and then with the int8-quantized transformer. Reports the speed of each
+    (audio seconds per wall second) and the word error rate of a transcription of
+    each against the input text, so the quantized voice can be held to the fp32 one.
+    """
+    import torchaudio as ta
+    from textToSpeech import TextToSpeech
+    text = " ".join(_WORDS).capitalize() + "."
+    tts = TextToSpeech(device="cpu", voice_sample=voice_sample, threads=threads, warmup=True)
+    transcriber = load_transcriber(None, caption_model)
+    results = {}
+    for mode in ("fp32", "int8"):
+        if mode == "int8":
+            tts.quantize()
+            tts.warm_up()
+        start = time.perf_counter()
+        wav = tts._generate_chunk(text, seed=seed)
+        wall = time.perf_counter() - start
+        output = os.path.join(work_dir, f"tts_{mode}.wav")
+        ta.save(output, wav.unsqueeze(0), tts.model.sr)
+        heard = " ".join(w["word"] for segment in transcriber.transcribe(output) for w in segment)
+        seconds = wav.numel() / tts.model.sr
+        results[f"tts[{mode}]"] = {"wall_s": wall, "throughput": seconds / wall, "wer": word_error_rate(text, heard)}
+    return results
+
+
+def bench_startup(repeat: int) -> tuple:
+    """
+    Best-of-repeat wall time of a fresh interpreter running main.py --help (next
+    to a bare interpreter for reference), and the heavy modules importing main
+    pulled in, which should be none.
+    """
+    root = os.path.dirname(os.path.abspath(__file__))
+    probe = f"import sys, main; print(','.join(m for m in {_HEAVY_MODULES!r} if m in sys.modules))"
+    heavy = subprocess.run([sys.executable, "-c", probe], cwd=root, stdout=subprocess.PIPE, text=True, check=True).stdout.strip()
+    results = {}
+    for name, command in (("python", ["-c", "pass"]), ("main --help", ["main.py", "--help"])):
+        best = min(
+            _timed(lambda: subprocess.run([sys.executable, *command], cwd=root, stdout=subprocess.DEVNULL, check=True))
+            for _ in range(repeat)
+        )
+        results[f"startup[{name}]"] = {"wall_s": best, "throughput": 1 / best}
+    return results, heavy.split(",") if heavy else []
+
+
+def run(lengths: list, repeat: int, fixtures_dir: str, skip_tts: bool = False, profile: str = "publish", aligner=None) -> dict:
+    """Best-of-repeat throughput (video seconds per wall second) of every stage at every length."""
+    results = {}
+    for seconds in lengths:
+        fixtures = make_fixtures(fixtures_dir, seconds)
+        work_dir = os.path.join(fixtures_dir, "work")
+        os.makedirs(work_dir, exist_ok=True)
+        best = {}
+        for _ in range(repeat):
+            timings = bench_video(fixtures, seconds, work_dir, profile)
+            if not skip_tts:
+                timings.update(bench_tts(seconds, work_dir))
+            if aligner is not None:
+                timings.update(bench_align(fixtures, seconds, aligner))
+            for stage, wall in timings.items():
+                best[stage] = min(wall, best.get(stage, float("inf")))
+        for stage, wall in best.items():
+            results[f"{stage}@{seconds:g}s"] = {"wall_s": wall, "throughput": seconds / wall if wall else float("inf")}
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Names of benchmarks whose throughput fell more than tolerance below the baseline."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        change = result["throughput"] / base["throughput"] - 1
+        result["change"] = change
+        if change < -tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks of the captioning, TTS and render stages.")
+    parser.add_argument("--lengths", type=float, nargs="*", default=[15, 60], help="Narration lengths in seconds; none skips the stage benchmarks")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark; the fastest counts")
+    parser.add_argument("--fixtures", default=".cache/bench", help="Folder for generated fixtures")
+    parser.add_argument("--profile", default="publish", help="Render profile of the encodes; keep it the same as the baseline's")
+    parser.add_argument("--skip-tts", action="store_true", help="Only benchmark the video stages")
+    parser.add_argument("--align", action="store_true", help="Also time caption alignment with the real MMS aligner (downloaded on first use)")
+    parser.add_argument("--transcribe", nargs="+", metavar="BACKEND", help="Also time these caption backends (whisper, faster-whisper)")
+    parser.add_argument("--speech", default="voiceSample2.wav", help="Speech recording the caption backends transcribe")
+    parser.add_argument("--caption-model", help="Model size for the caption backends (default: CAPTION_MODEL, else base)")
+    parser.add_argument("--startup", action="store_true", help="Time CLI startup and check main.py imports no heavy module up front")
+    parser.add_argument("--tts-quality", action="store_true", help="Compare the real TTS model in fp32 and int8: speed and word error rate")
+    parser.add_argument("--voice", help="Voice sample of the --tts-quality run (default: the model's built-in voice)")
+    parser.add_argument("--max-wer-increase", type=float, default=0.05, help="Allowed word error rate of int8 above fp32 in --tts-quality")
+    parser.add_argument("--save", help="Write the results as JSON, e.g. to use as a baseline later")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed throughput drop before it counts as a regression")
+    args = parser.parse_args()
+
+    aligner = None
+    if args.align:
+        from captionAligner import ForcedAligner
+        aligner = ForcedAligner(device="cpu")
+    results = run(args.lengths, args.repeat, args.fixtures, args.skip_tts, args.profile, aligner)
+    if args.transcribe:
+        results.update(bench_transcription(args.transcribe, args.speech, args.repeat, args.caption_model))
+    regressions = []
+    if args.startup:
+        startup, heavy = bench_startup(args.repeat)
+        results.update(startup)
+        if heavy:
+            regressions.append(f"startup imports {', '.join(heavy)}")
+    if args.tts_quality:
+        work_dir = os.path.join(args.fixtures, "work")
+        os.makedirs(work_dir, exist_ok=True)
+        quality = bench_tts_quality(work_dir, args.voice, caption_model=args.caption_model)
+        results.update(quality)
+        if quality["tts[int8]"]["wer"] - quality["tts[fp32]"]["wer"] > args.max_wer_increase:
+            regressions.append("tts[int8] word error rate")
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions += compare(results, json.load(f)["results"], args.tolerance)
+
+    print(f"\n{'benchmark':<32}{'wall s':>10}{'video s / s':>14}{'words / s':>12}{'WER':>8}{'vs baseline':>14}")
+    for name, result in results.items():
+        change = f"{result['change']:+.1%}" if "change" in result else ""
+        words = f"{result['words_per_s']:.1f}" if "words_per_s" in result else ""
+        wer = f"{result['wer']:.1%}" if "wer" in result else ""
+        print(f"{name:<32}{result['wall_s']:>10.2f}{result['throughput']:>14.2f}{words:>12}{wer:>8}{change:>14}")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"host": platform.node(), "cpus": os.cpu_count(), "profile": args.profile, "results": results}, f, indent=2)
+    if regressions:
+        print(f"\nRegressions beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
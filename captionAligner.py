@@ -0,0 +1,94 @@
+import re
+import unicodedata
+import torch
+import torchaudio
+
+# wav2vec2's receptive field: the model raises on input shorter than one frame
+_MIN_SAMPLES = 400
+
+class ForcedAligner:
+    def __init__(self, device: str | None = None, window_seconds: float = 30.0):
+        """
+        Aligns a known script to speech with torchaudio's MMS forced-alignment
+        model (CTC), instead of decoding the words again with Whisper.
+
+        Args:
+            device (str, optional): "cuda" or "cpu". Defaults to CUDA when available.
+            window_seconds (float): Audio is fed to the acoustic model in windows of
+                this length to keep attention memory flat on long stories.
+        """
+        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        self.bundle = torchaudio.pipelines.MMS_FA
+        self.model = self.bundle.get_model(with_star=False).to(self.device)
+        self.model.eval()
+        self.tokenizer = self.bundle.get_tokenizer()
+        self.aligner = self.bundle.get_aligner()
+        self.sample_rate = self.bundle.sample_rate
+        self.window_seconds = window_seconds
+
+    def _normalize(self, word: str) -> str:
+        """Reduce a script word to the aligner's alphabet (lowercase a-z and apostrophe)."""
+        word = unicodedata.normalize("NFKD", word).encode("ascii", "ignore").decode()
+        word = word.lower().replace("’", "'")
+        return re.sub(r"[^a-z']", "", word)
+
+    def _load(self, audio, sample_rate: int | None) -> torch.Tensor:
+        """Return a mono [1, T] waveform at the aligner's sample rate."""
+        if isinstance(audio, str):
+            waveform, sample_rate = torchaudio.load(audio)
+        else:
+            waveform = audio if audio.dim() == 2 else audio.unsqueeze(0)
+        if waveform.size(0) > 1:
+            waveform = waveform.mean(dim=0, keepdim=True)
+        if sample_rate != self.sample_rate:
+            waveform = torchaudio.functional.resample(waveform, sample_rate, self.sample_rate)
+        return waveform
+
+    def _emission(self, waveform: torch.Tensor) -> torch.Tensor:
+        """Frame-level CTC emissions for the whole clip, computed window by window."""
+        window = int(self.window_seconds * self.sample_rate)
+        total = waveform.size(1)
+        if total < _MIN_SAMPLES:
+            waveform = torch.nn.functional.pad(waveform, (0, _MIN_SAMPLES - total))
+            total = _MIN_SAMPLES
+        starts = list(range(0, total, window))
+        if len(starts) > 1 and total - starts[-1] < _MIN_SAMPLES:
+            starts.pop()  # a tail shorter than one frame is run with the window before it
+        ends = starts[1:] + [total]
+        emissions = []
+        with torch.inference_mode():
+            for start, end in zip(starts, ends):
+                piece = waveform[:, start:end].to(self.device)
+                emission, _ = self.model(piece)
+                emissions.append(emission[0].cpu())
+        return torch.cat(emissions)
+
+    def align(self, audio, text: str, sample_rate: int | None = None, offset: float = 0.0) -> list:
+        """
+        Align text to audio (a file path or a waveform tensor at sample_rate).
+
+        Returns:
+            list: Whisper-style word timings [{"word", "start", "end"}, ...] in
+            script order, shifted by offset seconds. Words with nothing to align
+            (numbers, symbols) borrow the timing of the word before them.
+        """
+        words = text.split()
+        keys = [self._normalize(w) for w in words]
+        alignable = [k for k in keys if k]
+        if not alignable:
+            return []
+
+        waveform = self._load(audio, sample_rate)
+        emission = self._emission(waveform)
+        spans = self.aligner(emission, self.tokenizer(alignable))
+        ratio = waveform.size(1) / emission.size(0) / self.sample_rate
+
+        result, aligned = [], iter(spans)
+        for word, key in zip(words, keys):
+            if key:
+                span = next(aligned)
+                start, end = span[0].start * ratio, span[-1].end * ratio
+            else:
+                start = end = result[-1]["end"] - offset if result else 0.0
+            result.append({"word": word, "start": start + offset, "end": end + offset})
+        return result
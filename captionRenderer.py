@@ -0,0 +1,81 @@
+import os
+import ffmpeg
+
+class CaptionRenderer:
+    def __init__(
+        self,
+        font_file: str = "fonts/bangers.ttf",
+        font_name: str = "Bangers",
+        font_size: int = 100,
+        border: int = 4,
+        y_offset: int = 20
+    ):
+        """
+        Burns captions into a video as one styled ASS track instead of one
+        drawtext filter per caption.
+
+        Args:
+            font_file (str): TTF used for the captions; its folder is handed to libass as
+                fontsdir, and libass loads every file in it, so keep it a fonts-only folder.
+            font_name (str): Family name inside font_file.
+            font_size (int): Caption size in pixels of the output video.
+            border (int): Black outline width in pixels.
+            y_offset (int): Captions sit this many pixels below the vertical centre.
+        """
+        self.font_file = font_file
+        self.font_name = font_name
+        self.font_size = font_size
+        self.border = border
+        self.y_offset = y_offset
+
+    def _format_time_ass(self, seconds: float) -> str:
+        """Convert seconds to ASS timestamp format (H:MM:SS.cc)."""
+        centis = int(round(seconds * 100))
+        hours, centis = divmod(centis, 360000)
+        minutes, centis = divmod(centis, 6000)
+        secs, centis = divmod(centis, 100)
+        return f"{hours:d}:{minutes:02d}:{secs:02d}.{centis:02d}"
+
+    def _escape(self, text: str) -> str:
+        """Keep caption text from being read as ASS override tags or line breaks."""
+        return text.replace("\\", "/").replace("{", "(").replace("}", ")").replace("\n", " ")
+
+    def write_ass(self, captions: list, ass_file: str, width: int, height: int):
+        """
+        Write captions ([{"start", "end", "text"}, ...]) as an ASS file whose
+        canvas matches the video, so font_size is in real output pixels.
+        """
+        x, y = width // 2, height // 2 + self.y_offset
+        lines = [
+            "[Script Info]",
+            "ScriptType: v4.00+",
+            f"PlayResX: {width}",
+            f"PlayResY: {height}",
+            "ScaledBorderAndShadow: yes",
+            "WrapStyle: 0",
+            "",
+            "[V4+ Styles]",
+            "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, "
+            "Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, "
+            "Alignment, MarginL, MarginR, MarginV, Encoding",
+            f"Style: Caption,{self.font_name},{self.font_size},&H00FFFFFF,&H00FFFFFF,&H00000000,&H00000000,"
+            f"0,0,0,0,100,100,0,0,1,{self.border},0,5,0,0,0,1",
+            "",
+            "[Events]",
+            "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text",
+        ]
+        for caption in captions:
+            start = self._format_time_ass(caption["start"])
+            end = self._format_time_ass(caption["end"])
+            text = self._escape(caption["text"])
+            lines.append(f"Dialogue: 0,{start},{end},Caption,,0,0,0,,{{\\an5\\pos({x},{y})}}{text}")
+
+        with open(ass_file, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        print(f"ASS captions ({len(captions)} events) saved to {ass_file}")
+
+    def apply(self, stream, ass_file: str):
+        """Burn the ASS track into stream with a single ass filter."""
+        # not the working directory: libass would try every video and script there as a font
+        fonts_dir = os.path.dirname(os.path.abspath(self.font_file))
+        return ffmpeg.filter(stream, "ass", ass_file, fontsdir=fonts_dir)
@@ -0,0 +1,97 @@
+import os
+import re
+import json
+import math
+import tempfile
+import threading
+from fileLock import file_lock
+
+class DurationEstimator:
+    def __init__(self, history_file: str = ".cache/durations.json", max_samples: int = 200, default_seconds_per_char: float = 0.065):
+        """
+        Predicts narration length from text before any TTS runs, calibrated from
+        past (character count, speed, voice) → seconds measurements.
+
+        Args:
+            history_file (str): JSON file the measurements are kept in.
+            max_samples (int): Most recent measurements kept per voice.
+            default_seconds_per_char (float): Rate used until a voice has history
+                (about 15 characters per second of speech).
+        """
+        self.history_file = history_file
+        self.max_samples = max_samples
+        self.default_seconds_per_char = default_seconds_per_char
+        self._lock = threading.Lock()
+        self.history = self._read()
+
+    def _read(self) -> dict:
+        if os.path.exists(self.history_file):
+            with open(self.history_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        return {}
+
+    def record(self, voice: str, text: str, speed: float, seconds: float):
+        """
+        Add a measured narration length for voice. The file is read again under
+        a lock and the sample added to what is there, so worker processes
+        sharing it keep each other's measurements.
+        """
+        with self._lock, file_lock(self.history_file):
+            history = self._read()
+            samples = history.setdefault(voice, [])
+            samples.append([len(text), float(speed), float(seconds)])
+            del samples[:-self.max_samples]
+            folder = os.path.dirname(self.history_file) or "."
+            fd, tmp = tempfile.mkstemp(dir=folder, suffix=".part")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(history, f)
+            os.replace(tmp, self.history_file)
+            self.history = history
+
+    def _fit(self, voice: str) -> tuple:
+        """Least-squares (intercept, seconds per char) at normal speed for voice."""
+        samples = self.history.get(voice, [])
+        if len(samples) < 3:
+            return 0.0, self.default_seconds_per_char
+        xs = [chars for chars, _, _ in samples]
+        ys = [seconds * speed for _, speed, seconds in samples]
+        n = len(xs)
+        mean_x, mean_y = sum(xs) / n, sum(ys) / n
+        var_x = sum((x - mean_x) ** 2 for x in xs)
+        if var_x == 0:
+            return 0.0, mean_y / mean_x if mean_x else self.default_seconds_per_char
+        slope = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var_x
+        intercept = mean_y - slope * mean_x
+        if slope <= 0:
+            return 0.0, mean_y / mean_x
+        return intercept, slope
+
+    def estimate(self, text: str, speed: float = 1.0, voice: str = "") -> float:
+        """Predicted narration length of text in seconds."""
+        intercept, slope = self._fit(voice)
+        return max(0.0, intercept + slope * len(text)) / speed
+
+    def plan_max_len(self, text: str, voice: str = "", target_chunk_seconds: float = 35.0, ceiling: int = 700) -> int:
+        """
+        Characters per TTS chunk for text: enough chunks that none runs past
+        target_chunk_seconds (the model stops generating at about 40 s of speech),
+        sized evenly so the story does not end on a short, oddly paced tail.
+        """
+        _, slope = self._fit(voice)
+        longest = max(100, min(ceiling, int(target_chunk_seconds / slope)))
+        chunks = max(1, math.ceil(len(text) / longest))
+        # headroom so sentence boundaries still fit into the even split
+        return min(longest, math.ceil(len(text) / chunks) + 60)
+
+    def fit_text(self, text: str, max_seconds: float, speed: float = 1.0, voice: str = "") -> str:
+        """Cut text at a sentence boundary so its estimated narration fits in max_seconds."""
+        if self.estimate(text, speed, voice) <= max_seconds:
+            return text
+        sentences = re.split(r"(?<=[\.\!\?])\s+", text.strip())
+        kept = sentences[:1]
+        for sentence in sentences[1:]:
+            candidate = " ".join(kept + [sentence])
+            if self.estimate(candidate, speed, voice) > max_seconds:
+                break
+            kept.append(sentence)
+        return " ".join(kept)
@@ -0,0 +1,27 @@
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl  # not available on Windows
+except ImportError:
+    fcntl = None
+
+@contextmanager
+def file_lock(path: str):
+    """
+    Exclusive lock on path, held across processes (e.g. run_pool workers) until
+    the block exits, for read-modify-write of a shared state file. The lock is
+    taken on a path + ".lock" sidecar, so the state file itself can still be
+    replaced atomically inside the block. Without fcntl (Windows) it only
+    creates the sidecar and does not lock.
+    """
+    folder = os.path.dirname(path) or "."
+    os.makedirs(folder, exist_ok=True)
+    with open(path + ".lock", "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
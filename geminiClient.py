@@ -1,10 +1,78 @@
-import google.generativeai as genai
+import re
+import random
+
+def _batch_prompt(prompt: str, count: int) -> str:
+    return (
+        f"{prompt}\n\nWrite {count} different question and story pairs. "
+        "Start every pair with ~, put ~ between the question and its story, and write nothing else."
+    )
+
+def _clean(part: str) -> str:
+    """Strip list numbering, markdown emphasis and Question:/Story: labels the model likes to add."""
+    part = re.sub(r"^(\d+[\.\)]\s*)?\**\s*((question|story)\s*:)?\s*\**", "", part.strip(), count=1, flags=re.IGNORECASE)
+    return part.strip().strip("*").strip()
+
+def parse_stories(answer: str, min_story_words: int = 30, max_question_chars: int = 300) -> list:
+    """
+    Extract (question, story) pairs from a ~question~story formatted answer.
+    Preamble before the first ~, stray separators and malformed pairs are
+    skipped instead of shifting every later pair out of place.
+    """
+    parts = [p.strip() for p in answer.split("~")[1:]]
+    parts = [p for p in parts if p]
+    stories, i = [], 0
+    while i + 1 < len(parts):
+        question, story = _clean(parts[i]), _clean(parts[i + 1])
+        if question and len(question) <= max_question_chars and len(story.split()) >= min_story_words:
+            stories.append((question, story))
+            i += 2
+        else:
+            i += 1
+    return stories
 
 class GeminiClient:
     def __init__(self, API_KEY: str, model: str = "gemini-2.5-flash"):
-        genai.configure(api_key=API_KEY)
-        self.model = genai.GenerativeModel(model)
+        self.api_key = API_KEY
+        self.model_name = model
+        self.model = None  # set up on the first query; google.generativeai is slow to import
 
     def query(self, prompt: str) -> str:
+        if self.model is None:
+            import google.generativeai as genai
+            genai.configure(api_key=self.api_key)
+            self.model = genai.GenerativeModel(self.model_name)
         response = self.model.generate_content(prompt)
-        return response.text
\ No newline at end of file
+        return response.text
+
+    def query_stories(self, prompt: str, count: int) -> list:
+        """Ask for count stories in one request and return the valid (question, story) pairs."""
+        return parse_stories(self.query(_batch_prompt(prompt, count)))
+
+class LocalGeminiClient:
+    """Offline stand-in for GeminiClient that answers with made-up stories in the ~question~story format."""
+    names = ["my neighbour", "my sister", "a coworker", "my landlord", "an old friend", "my roommate", "the mailman", "my uncle"]
+    places = ["the old house at the end of my street", "the office parking lot", "my grandmother's attic", "a gas station off the highway", "the school library", "a cabin by the lake"]
+    things = ["a box of letters", "a light that kept flickering", "a key with no lock", "a phone that rang at midnight", "a photo of me as a child", "a note on my door"]
+    endings = ["I still do not know what it meant", "nobody believed me", "we never talked about it again", "it changed how I see people", "I moved out a month later", "it turned out to be a prank"]
+
+    def __init__(self, API_KEY: str | None = None, model: str = "local"):
+        self.model = model
+        self.calls = 0
+        self.rng = random.Random()
+
+    def query(self, prompt: str) -> str:
+        self.calls += 1
+        pick = self.rng.choice
+        question = f"What is the strangest thing that ever happened to you? (story {self.calls})"
+        sentences = [
+            f"It started when {pick(self.names)} told me about {pick(self.things)} in {pick(self.places)}.",
+            f"I went to {pick(self.places)} {self.rng.randint(2, 9)} days later just to see for myself.",
+            f"Right away I found {pick(self.things)}, and then {pick(self.names)} showed up without saying a word.",
+            f"We stood there for {self.rng.randint(3, 40)} minutes before {pick(self.names)} finally explained everything.",
+            f"In the end {pick(self.endings)}, and {pick(self.endings)}.",
+        ]
+        self.rng.shuffle(sentences)
+        return f"~{question}~{' '.join(sentences)}"
+
+    def query_stories(self, prompt: str, count: int) -> list:
+        return parse_stories("\n".join(self.query(prompt) for _ in range(count)))
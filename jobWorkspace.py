@@ -0,0 +1,38 @@
+import os
+import uuid
+import shutil
+from datetime import datetime
+
+class JobWorkspace:
+    def __init__(self, root: str = "jobs", job_id: str | None = None):
+        """
+        Private scratch directory for one job, e.g. jobs/20250101-120000-1a2b3c/.
+
+        Args:
+            root (str): Folder that holds all job workspaces.
+            job_id (str, optional): Reuse an existing job's workspace. A new unique id is made when omitted.
+        """
+        self.job_id = job_id or f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        self.path = os.path.join(root, self.job_id)
+        os.makedirs(self.path, exist_ok=True)
+
+    def file(self, name: str) -> str:
+        """Return the path of an artifact inside this workspace."""
+        return os.path.join(self.path, name)
+
+    def cleanup(self, keep: tuple = ()):
+        """Delete everything in the workspace except the files named in keep; drop the folder if nothing is left."""
+        if not os.path.isdir(self.path):
+            return
+        keep = {os.path.basename(k) for k in keep}
+        for name in os.listdir(self.path):
+            if name in keep:
+                continue
+            target = os.path.join(self.path, name)
+            if os.path.isdir(target):
+                shutil.rmtree(target, ignore_errors=True)
+            else:
+                os.remove(target)
+        if not os.listdir(self.path):
+            os.rmdir(self.path)
+        print(f"Cleaned up workspace {self.path}")
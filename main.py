@@ -1,94 +1,141 @@
-from geminiClient import GeminiClient
-from textToSpeech import TextToSpeech
-from videoGenerator import VideoProcessor
-from youtubeUploader import YouTubeUploader
-from dotenv import load_dotenv
-from datetime import datetime
+from batchWorker import BatchWorker, new_job, read_queue, remove_from_queue, run_pool, STAGE_INPUTS
+from renderProfiles import RENDER_PROFILES
 
 import os
-import time
-import random
-
-audioOutputFileName = "output.mp3"
-finalOutputFileName = "finalOutput.mp4"
-redditTemplateVideos = ["minecraft.mp4", "gta.mp4", "surfers.mp4"]
-subreddits = ["unsolved mysteries", "true crime", "scary stories", "reddit stories", "karma stories", "today I fucked up", "am I the asshole"]
-tags = {
-    "unsolved mysteries": ["mystery", "unsolved mysteries", "creepy", "paranormal", "true crime", "conspiracy", "unexplained", "spooky", "intrigue", "cold case"],
-    "true crime": ["true crime", "crime", "murder", "investigation", "serial killer", "mystery", "forensic", "crime documentary", "justice", "criminal"],
-    "scary stories": ["scary stories", "horror", "creepy", "ghost stories", "paranormal", "spooky", "terrifying", "haunted", "supernatural", "chilling"],
-    "reddit stories": ["reddit stories", "reddit", "storytime", "tales", "rslash", "askreddit", "funny stories", "drama", "anecdotes", "social media"],
-    "karma stories": ["karma stories", "karma", "wholesome", "feel good", "justice served", "payback", "revenge stories", "uplifting", "satisfying", "life lessons"],
-    "today I fucked up": ["TIFU", "funny fails", "oops", "embarrassing", "funny stories", "reddit TIFU", "mistakes", "hilarious", "cringe", "comedy"],
-    "am I the asshole": ["AITA", "am I the asshole", "relationships", "judgment", "reddit AITA", "drama", "morality", "ethics", "social dilemmas", "conflict"]
-}
-descriptions = {
-    "unsolved mysteries": "Explore the unknown and the eerie with gripping tales of unsolved cases and bizarre events that defy explanation. From mysterious disappearances to paranormal encounters, dive into the world of the unexplained. #mystery #unsolvedmysteries #creepy #paranormal #truecrime #conspiracy #unexplained #spooky #intrigue #coldcase",
-    "true crime": "Delve into real-life criminal cases that shock and captivate. From infamous murders to chilling investigations, uncover the dark details behind the headlines. #truecrime #crime #murder #investigation #serialkiller #mystery #forensic #crimedocumentary #justice #criminal",
-    "scary stories": "Get ready for spine-chilling tales that will keep you up at night. From ghostly encounters to supernatural horrors, these stories are guaranteed to send shivers down your spine. #scarystories #horror #creepy #ghoststories #paranormal #spooky #terrifying #haunted #supernatural #chilling",
-    "reddit stories": "Discover intriguing stories from Reddit that range from hilarious to heartwarming to downright bizarre. Join us as we dive into the best tales from the internet’s most vibrant communities. #redditstories #reddit #storytime #tales #rslash #askreddit #funnystories #drama #anecdotes #socialmedia",
-    "karma stories": "Enjoy uplifting tales of justice where good deeds are rewarded and wrongdoers get their comeuppance. These satisfying stories of karma will leave you feeling inspired. #karmastories #karma #wholesome #feelgood #justiceserved #payback #revengestories #uplifting #satisfying #lifelessons",
-    "today I fucked up": "Laugh at relatable fails and oops moments that make you glad it wasn’t you. From embarrassing blunders to hilarious mishaps, these stories are pure comedy gold. #TIFU #funnyfails #oops #embarrassing #funnystories #redditTIFU #mistakes #hilarious #cringe #comedy",
-    "am I the asshole": "Engage in moral dilemmas and judgments with stories that spark debate. Are they in the wrong, or is it someone else? Dive into the drama and decide for yourself. #AITA #amItheasshole #relationships #judgment #redditAITA #drama #morality #ethics #socialdilemmas #conflict"
-}
-playlistIds = {
-    "unsolved mysteries": "PLgcw4jDW3kqNlxGZ9wlqRegZMgPTiol8j",
-    "true crime": "PLgcw4jDW3kqOCYVw9kD-iOVZxBZOCYcTX",
-    "scary stories": "PLgcw4jDW3kqPDQ6bXWb1u5yaw390jXjqe",
-    "reddit stories": "PLgcw4jDW3kqP8Od8Kw6ZyO9aXpZWSpvG-",
-    "karma stories": "PLgcw4jDW3kqPfssSGnSvxFkjQJJsnPZO9",
-    "today I fucked up": "PLgcw4jDW3kqMKGKi7bMIZFBXYmvmOX7dL",
-    "am I the asshole": "PLgcw4jDW3kqOJB9q5jedDhDFi3DmFcv4k"
-}
+import argparse
+
+# Only lightweight modules are imported here: torch, chatterbox, Whisper and the
+# Google clients load when the stage that needs them runs, so --help, a dry run
+# or an upload-only command start in well under a second.
+
+
+def _add_run_options(parser) -> list:
+    actions = [
+        parser.add_argument("--count", type=int, default=1, help="Number of videos to make with the loaded models"),
+        parser.add_argument("--queue", help="JSON-lines queue file of jobs to work through instead of --count"),
+        parser.add_argument("--subreddit", help="Subreddit to use for every --count job (random by default)"),
+        parser.add_argument("--resume", nargs="+", metavar="JOB_ID", help="Re-run failed jobs, skipping every stage already cached"),
+        parser.add_argument("--concurrency", type=int, default=1, help="Worker processes running jobs side by side"),
+        parser.add_argument("--pipeline", action="store_true", help="Overlap story, TTS, render and upload stages of consecutive jobs"),
+        parser.add_argument("--render-workers", type=int, default=1, help="Render workers in --pipeline mode"),
+    ]
+    return actions
+
+
+def _add_worker_options(parser) -> list:
+    actions = [
+        parser.add_argument("--upload-workers", type=int, default=2, help="Videos uploading at the same time"),
+        parser.add_argument("--story-batch", type=int, default=0, help="Fetch this many stories per Gemini request into a local buffer"),
+        parser.add_argument("--allow-duplicates", action="store_true", help="Skip the near-duplicate story check"),
+        parser.add_argument("--max-seconds", type=float, help="Cut stories so the narration is predicted to fit in this many seconds"),
+        parser.add_argument("--offline", action="store_true", help="Use local stand-ins for Gemini and YouTube"),
+        parser.add_argument("--tts-workers", type=int, default=1, help="CPU processes synthesizing story chunks in parallel"),
+        parser.add_argument("--tts-threads", type=int, help="Torch threads of TTS generation (default: all cores, split between --concurrency workers)"),
+        parser.add_argument("--tts-quantize", action="store_true", help="Run the TTS transformer with int8 dynamic quantization on CPU"),
+        parser.add_argument("--tts-compile", action="store_true", help="torch.compile the TTS transformer"),
+        parser.add_argument("--model-budget-mb", type=float, help="Memory budget of each worker; least recently used models are unloaded past it (default: MODEL_RSS_BUDGET_MB, else unlimited)"),
+        parser.add_argument("--no-stream", action="store_true", help="Synthesize the whole story before encoding and captioning"),
+        parser.add_argument("--whisper-captions", action="store_true", help="Transcribe captions instead of aligning the known story"),
+        parser.add_argument("--caption-backend", choices=["whisper", "faster-whisper"], help="Transcriber for --whisper-captions (default: CAPTION_BACKEND, else whisper)"),
+        parser.add_argument("--caption-model", help="Transcriber model size, e.g. tiny, base, small (default: CAPTION_MODEL, else base)"),
+        parser.add_argument("--profile", choices=list(RENDER_PROFILES), help="Render profile (default: the one picked by 'python renderProfiles.py autotune', else publish)"),
+        parser.add_argument("--question-seconds", type=float, help="Show the question card for this many seconds (default: the whole video)"),
+        parser.add_argument("--trace-dir", help="Write a Chrome trace of every job's stages into this folder"),
+        parser.add_argument("--no-upload", action="store_true", help="Render only, keep the video locally"),
+    ]
+    return actions
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Generate Reddit story videos and upload them to YouTube.")
+    _add_run_options(parser)
+    _add_worker_options(parser)
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND", help="Without a command, every stage runs (same as 'run')")
+
+    def add_command(name: str, summary: str, run_options: bool = False):
+        command = commands.add_parser(name, help=summary)
+        actions = _add_worker_options(command) + (_add_run_options(command) if run_options else [])
+        # options given before the command keep their value unless repeated after it
+        for action in actions:
+            action.default = argparse.SUPPRESS
+        return command
+
+    add_command("run", "Make videos end to end", run_options=True)
+    story = add_command("story", "Write the story of a new job (or of JOB_ID) and print the job id")
+    story.add_argument("job_id", nargs="?", help="Job to (re)write the story of")
+    story.add_argument("--subreddit", default=argparse.SUPPRESS, help="Subreddit of a new job (random by default)")
+    for name, summary in (
+        ("synthesize", "Narrate the story of an existing job"),
+        ("render", "Render the video of an existing job from its narration"),
+        ("upload", "Upload the rendered video of an existing job"),
+    ):
+        add_command(name, summary).add_argument("job_id", help="Job id, as printed by the previous stage")
+    return parser
+
+
+def run_single_stage(args, worker_kwargs: dict) -> int:
+    """Run one stage on the saved artifacts of a job, e.g. after editing its story or to retry an upload."""
+    if args.command == "story":
+        job = new_job(args.subreddit, job_id=args.job_id)
+    else:
+        if not os.path.exists(os.path.join("jobs", args.job_id, "job.json")):
+            print(f"No job {args.job_id} under jobs/")
+            return 1
+        job = new_job(job_id=args.job_id)
+        missing = [key for key in STAGE_INPUTS[args.command] if key not in job]
+        if missing:
+            print(f"Job {job['id']} has no {', '.join(missing)} yet; run the earlier stages first")
+            return 1
+    BatchWorker(**worker_kwargs).run_stage(args.command, job)
+    print(f"Job {job['id']}: {args.command} done ({job['workdir']})")
+    return 0
 
 
 def main():
-    startTime = time.time()
-    load_dotenv()
-    API_KEY = os.getenv("GEMINI_API_KEY")
-    gemini = GeminiClient(API_KEY)
-
-    question = os.getenv("GEMINI_QUESTION_PROMPT")
-    subreddit = random.choice(subreddits)
-    question = question.replace("{subreddit}", subreddit)
-    answer = gemini.query(question)
-
-    redditQuestion = answer.split("~")[1].strip()
-    story = answer.split("~")[2].strip()
-    print("redditQuestion: ", redditQuestion)
-    print("story: ", story)
-
-    textToSpeech = TextToSpeech(
-        voice_sample="voiceSample2.wav",
-        exaggeration=0.6,
-        cfg_weight=0.3
-    )
-    textToSpeech.synthesize(story, audioOutputFileName, speed = 1)
-
-    redditTemplateVideo = random.choice(redditTemplateVideos)
-    processor = VideoProcessor(redditTemplateVideo, audioOutputFileName, finalOutputFileName, redditQuestion)
-    processor.process_video(random_start=True)
-    
-    uploader = YouTubeUploader(env_file = ".env", video_file = finalOutputFileName)
-    uploader.authenticate()
-    response = uploader.upload_video(
-        title = redditQuestion + " #" + str(random.randint(0, 999)),
-        description = descriptions[subreddit],
-        tags = tags[subreddit],
-        category_id = "22",
-        privacy_status = "public",
-        playlist_id = playlistIds[subreddit]
-    )
-    if response:
-        print(f"Video uploaded with ID: {response.get('id')}")
-
-    endTime = time.time()
-    print(f"Execution time: {endTime - startTime} seconds")
-    now = datetime.now()
-    formatted = now.strftime("%Y-%m-%d %H:%M:%S")
-    with open("lastExecuted.txt", "a", encoding="utf-8") as f:
-        print(f"Last Executed to Completion: {formatted}, Execution Time: {endTime - startTime} seconds", file=f)
-    exit()
+    args = build_parser().parse_args()
+
+    worker_kwargs = {
+        "upload": not args.no_upload,
+        "align_captions": not args.whisper_captions,
+        "tts_workers": args.tts_workers,
+        "tts_threads": args.tts_threads,
+        "tts_quantize": args.tts_quantize,
+        "tts_compile": args.tts_compile,
+        "model_budget_mb": args.model_budget_mb,
+        "stream_audio": not args.no_stream,
+        "offline": args.offline,
+        "story_batch": args.story_batch,
+        "dedupe": not args.allow_duplicates,
+        "max_seconds": args.max_seconds,
+        "upload_concurrency": args.upload_workers,
+        "trace_dir": args.trace_dir,
+        "render_profile": args.profile,
+        "question_seconds": args.question_seconds,
+        "caption_backend": args.caption_backend,
+        "whisper_model": args.caption_model
+    }
+    if args.command in STAGE_INPUTS:
+        exit(run_single_stage(args, worker_kwargs))
+
+    if args.queue:
+        jobs = read_queue(args.queue)
+        on_success = lambda job: remove_from_queue(args.queue, job["queue_entry"])
+    elif args.resume:
+        jobs = [new_job(job_id=job_id) for job_id in args.resume]
+        on_success = None
+    else:
+        jobs = [new_job(args.subreddit) for _ in range(args.count)]
+        on_success = None
+
+    if args.concurrency > 1:
+        failures = run_pool(jobs, args.concurrency, worker_kwargs, on_success=on_success)
+    elif args.pipeline:
+        failures = BatchWorker(**worker_kwargs).run_pipelined(
+            jobs, on_success=on_success, render_workers=args.render_workers
+        )
+    else:
+        failures = BatchWorker(**worker_kwargs).run(jobs, on_success=on_success)
+    exit(1 if failures else 0)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,155 @@
+import gc
+import os
+import sys
+import ctypes
+import threading
+from contextlib import contextmanager
+from profiler import stage, current_rss_mb
+
+def _release_memory():
+    """Hand freed model memory back to the OS so RSS actually drops."""
+    gc.collect()
+    torch = sys.modules.get("torch")  # only if something already imported it
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.empty_cache()
+    if sys.platform.startswith("linux"):
+        try:
+            ctypes.CDLL("libc.so.6").malloc_trim(0)
+        except (OSError, AttributeError):
+            pass  # not glibc
+
+class _Entry:
+    def __init__(self, loader, size_mb: float | None):
+        self.loader = loader
+        self.model = None
+        self.size_mb = size_mb  # measured at the last load, or the hint given at registration
+        self.pins = 0           # users inside use(); a pinned model is never evicted
+        self.last_used = 0
+        self.load_lock = threading.Lock()
+
+class ModelRegistry:
+    def __init__(self, budget_mb: float | None = None):
+        """
+        Loads models on first use and shares one instance between every object
+        that asks for it by name. When the process's RSS goes over budget_mb, the
+        least recently used models that nobody is using right now are dropped and
+        loaded again the next time they are needed, which bounds the peak memory
+        of a worker instead of keeping every stage's model resident.
+
+        Args:
+            budget_mb (float, optional): RSS budget of the process in MB
+                (MODEL_RSS_BUDGET_MB); None keeps every loaded model resident.
+        """
+        if budget_mb is None and os.getenv("MODEL_RSS_BUDGET_MB"):
+            budget_mb = float(os.getenv("MODEL_RSS_BUDGET_MB"))
+        self.budget_mb = budget_mb
+        self._entries = {}
+        self._clock = 0
+        self._lock = threading.Lock()
+
+    def register(self, name: str, loader, size_mb: float | None = None):
+        """
+        Declare how to load a model without loading it. size_mb is a guess of its
+        footprint, used to make room before the first load; later loads use the
+        measured size. Registering a name again keeps an already loaded instance.
+        """
+        with self._lock:
+            if name not in self._entries:
+                self._entries[name] = _Entry(loader, size_mb)
+
+    def loaded(self) -> list:
+        """Names of the models currently in memory, least recently used first."""
+        with self._lock:
+            entries = [(e.last_used, name) for name, e in self._entries.items() if e.model is not None]
+        return [name for _, name in sorted(entries)]
+
+    def _touch(self, entry: _Entry):
+        self._clock += 1
+        entry.last_used = self._clock
+
+    def _acquire(self, name: str):
+        with self._lock:
+            entry = self._entries[name]
+            entry.pins += 1  # pinned before loading so a concurrent eviction skips it
+            self._touch(entry)
+        try:
+            with entry.load_lock:
+                if entry.model is None:
+                    self._make_room(entry.size_mb or 0)
+                    before = current_rss_mb()
+                    with stage(f"load.{name.split(':')[0]}", model=name):
+                        entry.model = entry.loader()
+                    after = current_rss_mb()
+                    if before is not None and after is not None and after > before:
+                        entry.size_mb = after - before
+        except BaseException:
+            with self._lock:
+                entry.pins -= 1
+            raise
+        return entry
+
+    def _release(self, entry: _Entry, keep: str | None = None):
+        with self._lock:
+            entry.pins -= 1
+        self._make_room(0, keep)
+
+    def get(self, name: str):
+        """The loaded model, loading it if needed. It is not pinned; prefer use() around longer work."""
+        entry = self._acquire(name)
+        model = entry.model
+        self._release(entry, keep=name)  # the caller holds it now, evicting it would free nothing
+        return model
+
+    @contextmanager
+    def use(self, name: str):
+        """The loaded model, kept out of eviction until the block exits."""
+        entry = self._acquire(name)
+        try:
+            yield entry.model
+        finally:
+            self._release(entry)
+
+    def evict(self, name: str) -> bool:
+        """Drop a model that nobody is using. Returns False when it is in use or not loaded."""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or entry.model is None or entry.pins:
+                return False
+            model, entry.model = entry.model, None
+        close = getattr(model, "close", None)
+        if close is not None:
+            close()  # e.g. TextToSpeech's synthesis pool, which holds models of its own
+        del model
+        _release_memory()
+        print(f"Evicted model '{name}' (RSS now {current_rss_mb() or 0:.0f} MB)")
+        return True
+
+    def _make_room(self, needed_mb: float, keep: str | None = None):
+        """Evict least recently used, unpinned models (other than keep) until needed_mb more fits the budget."""
+        if self.budget_mb is None:
+            return
+        for name in self.loaded():
+            if name == keep:
+                continue
+            rss = current_rss_mb()
+            if rss is None or rss + needed_mb <= self.budget_mb:
+                return
+            self.evict(name)
+
+    def close(self):
+        """Drop every model that is not in use."""
+        for name in self.loaded():
+            self.evict(name)
+
+_shared = None
+_shared_lock = threading.Lock()
+
+def shared_registry(budget_mb: float | None = None) -> ModelRegistry:
+    """The process-wide registry every stage shares models through; a given budget_mb replaces its budget."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = ModelRegistry()
+        if budget_mb is not None:
+            _shared.budget_mb = budget_mb
+        return _shared
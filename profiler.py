@@ -0,0 +1,203 @@
+import os
+import sys
+import json
+import time
+import socket
+import threading
+import contextvars
+from contextlib import contextmanager
+
+try:
+    import resource  # not available on Windows
+except ImportError:
+    resource = None
+
+# the profiler of the job running on this thread; stage() records into it
+_current = contextvars.ContextVar("profiler", default=None)
+
+def _rss_mb(usage) -> float:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return usage.ru_maxrss / (1024 ** 2 if sys.platform == "darwin" else 1024)
+
+def _children_usage():
+    if resource is None:
+        return 0.0, None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime, _rss_mb(usage)
+
+def current_rss_mb() -> float | None:
+    """
+    Resident memory of this process in MB. Off Linux it falls back to the
+    peak RSS, which never goes down, so a budget check there errs on the side
+    of evicting. None when neither is available.
+    """
+    try:
+        with open("/proc/self/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    return _rss_mb(resource.getrusage(resource.RUSAGE_SELF))
+
+class _RssSampler:
+    """Polls the process's RSS while any stage is open and keeps the highest value seen by each."""
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self._peaks = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def open(self) -> object:
+        token = object()
+        rss = current_rss_mb()
+        with self._lock:
+            self._peaks[token] = rss
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+                self._thread.start()
+        return token
+
+    def close(self, token) -> tuple:
+        """(RSS now, highest RSS since open) in MB."""
+        rss = current_rss_mb()
+        with self._lock:
+            peak = self._peaks.pop(token)
+        if rss is not None and (peak is None or rss > peak):
+            peak = rss
+        return rss, peak
+
+    def _run(self):
+        while True:
+            rss = current_rss_mb()
+            with self._lock:
+                if not self._peaks:
+                    self._thread = None  # the next open() starts a new one
+                    return
+                if rss is not None:
+                    for token, peak in self._peaks.items():
+                        if peak is None or rss > peak:
+                            self._peaks[token] = rss
+            time.sleep(self.interval)
+
+_rss_sampler = _RssSampler()
+
+class Profiler:
+    def __init__(self, job_id: str, log_file: str = ".cache/profile.jsonl", trace_dir: str | None = None):
+        """
+        Records wall time, CPU time and peak memory of every stage of one job.
+        The finished profile is appended to log_file as one JSON line, and with
+        trace_dir also written as a Chrome trace (open it in chrome://tracing or
+        ui.perfetto.dev).
+
+        Per stage: wall_s, cpu_s (the whole process, so torch's intra-op
+        threads count; stages running side by side on other threads do too),
+        thread_cpu_s (the stage's own thread only), children_cpu_s (ffmpeg and
+        other subprocesses it waited for), rss_mb (this process's RSS when the
+        stage ended), peak_rss_mb (highest RSS sampled while it ran) and
+        children_peak_rss_mb (largest subprocess so far). Memory figures are
+        missing on Windows.
+
+        Args:
+            job_id (str): Job the stages belong to.
+            log_file (str): JSON-lines file profiles are appended to.
+            trace_dir (str, optional): Folder for <job id>.trace.json Chrome traces.
+        """
+        self.job_id = job_id
+        self.log_file = log_file
+        self.trace_dir = trace_dir
+        self.started = time.time()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def activate(self):
+        """Make this the profiler stage() records into on the current thread."""
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+    @contextmanager
+    def stage(self, name: str, **fields):
+        """Time the enclosed block as one stage; extra fields are stored with it."""
+        start = time.time()
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        thread_cpu = time.thread_time()
+        children_cpu, _ = _children_usage()
+        rss_token = _rss_sampler.open()
+        try:
+            yield
+        finally:
+            children_cpu_end, children_rss = _children_usage()
+            rss, peak_rss = _rss_sampler.close(rss_token)
+            span = {
+                "name": name,
+                "start": start,
+                "wall_s": time.perf_counter() - wall,
+                "cpu_s": time.process_time() - cpu,
+                "thread_cpu_s": time.thread_time() - thread_cpu,
+                "children_cpu_s": children_cpu_end - children_cpu,
+                "rss_mb": rss,
+                "peak_rss_mb": peak_rss,
+                "children_peak_rss_mb": children_rss,
+                "thread": threading.current_thread().name,
+                "tid": threading.get_ident(),
+                **fields
+            }
+            with self._lock:
+                self.spans.append(span)
+
+    def write(self, status: str = "ok"):
+        """Append this job's profile to the log and, when enabled, write its Chrome trace."""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span["start"])
+        record = {
+            "job": self.job_id,
+            "status": status,
+            "host": socket.gethostname(),
+            "cpus": os.cpu_count(),
+            "started": self.started,
+            "wall_s": time.time() - self.started,
+            "stages": spans,
+        }
+        os.makedirs(os.path.dirname(self.log_file) or ".", exist_ok=True)
+        with open(self.log_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+        if self.trace_dir:
+            self.export_trace(os.path.join(self.trace_dir, f"{self.job_id}.trace.json"), spans)
+
+    def export_trace(self, path: str, spans: list | None = None):
+        """Write the stages as Chrome trace events, one track per thread."""
+        if spans is None:
+            with self._lock:
+                spans = list(self.spans)
+        pid = os.getpid()
+        events = []
+        threads = {}
+        for span in spans:
+            threads[span["tid"]] = span["thread"]
+            args = {k: v for k, v in span.items() if k not in ("name", "start", "wall_s", "thread", "tid")}
+            events.append({
+                "name": span["name"], "ph": "X", "pid": pid, "tid": span["tid"],
+                "ts": span["start"] * 1e6, "dur": span["wall_s"] * 1e6, "args": args
+            })
+        for tid, name in threads.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}})
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"job": self.job_id}}, f)
+
+@contextmanager
+def stage(name: str, **fields):
+    """Record the enclosed block in the current thread's profiler, if any; a no-op otherwise."""
+    profiler = _current.get()
+    if profiler is None:
+        yield
+        return
+    with profiler.stage(name, **fields):
+        yield
@@ -0,0 +1,105 @@
+import os
+import tempfile
+from PIL import Image, ImageDraw, ImageFont
+from artifactCache import ArtifactCache
+
+class QuestionCard:
+    def __init__(
+        self,
+        cache: ArtifactCache | None = None,
+        font_file: str = "fonts/verdana.ttf",
+        font_size: int = 60,
+        min_font_size: int = 36,
+        border: int = 2,
+        max_width_ratio: float = 0.5,
+        max_height_ratio: float = 0.8,
+        line_spacing: int = 8
+    ):
+        """
+        Draws the question onto the card template once and keeps the PNG in the
+        artifact cache, keyed by question, template and style. The render then
+        overlays a static image instead of running drawtext on every video.
+
+        Lines are wrapped by their measured width in the font instead of by
+        character count. The font shrinks, down to min_font_size, when a long
+        question would not fit the card's height.
+
+        Args:
+            cache (ArtifactCache, optional): Where finished cards are kept.
+            font_file (str): TTF the question is set in.
+            font_size (int): Preferred size in pixels of the card.
+            min_font_size (int): Smallest size the font shrinks to for long questions.
+            border (int): White outline width in pixels around the black text.
+            max_width_ratio (float): Widest a line may be, as a share of the card's width.
+            max_height_ratio (float): Tallest the text block may be, as a share of the card's height.
+            line_spacing (int): Extra pixels between lines.
+        """
+        self.cache = cache or ArtifactCache()
+        self.font_file = font_file
+        self.font_size = font_size
+        self.min_font_size = min_font_size
+        self.border = border
+        self.max_width_ratio = max_width_ratio
+        self.max_height_ratio = max_height_ratio
+        self.line_spacing = line_spacing
+
+    def _wrap(self, text: str, font, max_width: float) -> list:
+        """Greedy word wrap by rendered width; a word wider than max_width gets a line of its own."""
+        lines, line = [], ""
+        for word in text.split():
+            candidate = f"{line} {word}" if line else word
+            if line and font.getlength(candidate) > max_width:
+                lines.append(line)
+                line = word
+            else:
+                line = candidate
+        if line:
+            lines.append(line)
+        return lines
+
+    def _line_height(self, font) -> int:
+        ascent, descent = font.getmetrics()
+        return ascent + descent + self.line_spacing
+
+    def _layout(self, question: str, width: int, height: int) -> tuple:
+        """(font, lines) at the largest size whose wrapped text fits the card."""
+        for size in range(self.font_size, self.min_font_size - 1, -2):
+            font = ImageFont.truetype(self.font_file, size)
+            lines = self._wrap(question, font, width * self.max_width_ratio)
+            if len(lines) * self._line_height(font) <= height * self.max_height_ratio:
+                break
+        return font, lines
+
+    def draw(self, question: str, template: str, output_file: str):
+        """Write the template with the question centred on it to output_file."""
+        with Image.open(template) as image:
+            card = image.convert("RGBA")
+        font, lines = self._layout(question, *card.size)
+        draw = ImageDraw.Draw(card)
+        line_height = self._line_height(font)
+        x = card.width / 2
+        y = (card.height - len(lines) * line_height + self.line_spacing) / 2
+        for line in lines:
+            draw.text(
+                (x, y), line, font=font, anchor="ma", fill="black",
+                stroke_width=self.border, stroke_fill="white"
+            )
+            y += line_height
+        card.save(output_file)
+
+    def path(self, question: str, template: str) -> str:
+        """Cached card for question on template, drawing it on a miss."""
+        key = self.cache.key(
+            "questionCard", question, self.cache.file_hash(template), self.cache.file_hash(self.font_file),
+            self.font_size, self.min_font_size, self.border, self.max_width_ratio, self.max_height_ratio, self.line_spacing
+        )
+        cached = self.cache.get(key, ".png")
+        if cached:
+            return cached
+        fd, tmp = tempfile.mkstemp(suffix=".png")
+        os.close(fd)
+        try:
+            self.draw(question, template, tmp)
+            return self.cache.put(key, tmp, ".png")
+        finally:
+            os.remove(tmp)
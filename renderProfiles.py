@@ -0,0 +1,182 @@
+import os
+import re
+import json
+import time
+import argparse
+import platform
+import subprocess
+import ffmpeg
+
+class RenderProfile:
+    def __init__(self, name: str, preset: str, crf: int, tune: str | None = None, threads: int = 0, width: int | None = 1080, height: int | None = 1920, fps: float | None = 30):
+        """
+        x264 and output settings of a rendered short.
+
+        Args:
+            name (str): Profile name.
+            preset (str): x264 preset; slower presets compress better at the same CRF.
+            crf (int): x264 constant rate factor; lower is higher quality.
+            tune (str, optional): x264 tune, e.g. "film" or "animation".
+            threads (int): Encoder threads; 0 lets x264 decide.
+            width (int, optional): Output width; None keeps the template's size.
+            height (int, optional): Output height.
+            fps (float, optional): Output frame rate; None keeps the template's.
+        """
+        self.name = name
+        self.preset = preset
+        self.crf = crf
+        self.tune = tune
+        self.threads = threads
+        self.width = width
+        self.height = height
+        self.fps = fps
+
+    def apply(self, stream):
+        """Scale/crop to the output size (filling the frame) and resample the frame rate."""
+        if self.width and self.height:
+            stream = ffmpeg.filter(stream, "scale", self.width, self.height, force_original_aspect_ratio="increase")
+            stream = ffmpeg.filter(stream, "crop", self.width, self.height)
+        if self.fps:
+            stream = ffmpeg.filter(stream, "fps", fps=self.fps)
+        return stream
+
+    def output_args(self) -> dict:
+        """ffmpeg output options of the video encode."""
+        args = {"vcodec": "libx264", "preset": self.preset, "crf": self.crf, "threads": self.threads, "pix_fmt": "yuv420p"}
+        if self.tune:
+            args["tune"] = self.tune
+        return args
+
+    def to_dict(self) -> dict:
+        return dict(self.__dict__)
+
+
+RENDER_PROFILES = {
+    "draft": RenderProfile("draft", "ultrafast", 28, "fastdecode", width=540, height=960),
+    "fast": RenderProfile("fast", "veryfast", 23),
+    "balanced": RenderProfile("balanced", "faster", 23),
+    "publish": RenderProfile("publish", "medium", 23),
+}
+# order autotune renders and reports the profiles in, roughly fastest first
+_SPEED_ORDER = ["draft", "fast", "balanced", "publish"]
+# what autotune compares quality against
+_REFERENCE = RenderProfile("reference", "slow", 16)
+
+TUNED_PROFILE_FILE = ".cache/renderProfile.json"
+
+
+def get_profile(name: str | None = None) -> RenderProfile:
+    """
+    Look up a profile by name. Without a name, the profile picked by the last
+    autotune on this host is used, or "publish" when autotune was never run.
+    """
+    if name is None and os.path.exists(TUNED_PROFILE_FILE):
+        with open(TUNED_PROFILE_FILE, "r", encoding="utf-8") as f:
+            name = json.load(f)["profile"]
+    name = name or "publish"
+    if name not in RENDER_PROFILES:
+        raise ValueError(f"Unknown render profile '{name}', choose from {', '.join(RENDER_PROFILES)}")
+    return RENDER_PROFILES[name]
+
+
+def _ssim(distorted: str, reference: str) -> float:
+    """Mean SSIM of distorted against reference, scaling distorted up to the reference size first."""
+    result = subprocess.run(
+        [
+            "ffmpeg", "-v", "info", "-i", distorted, "-i", reference, "-lavfi",
+            "[0:v][1:v]scale2ref[d][r];[d][r]ssim", "-f", "null", "-"
+        ],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True
+    )
+    match = re.search(r"All:([\d\.]+)", result.stderr.decode())
+    if not match:
+        raise RuntimeError("ffmpeg did not report an SSIM score")
+    return float(match.group(1))
+
+
+def _bitrate_kbps(filename: str) -> float:
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_entries", "format=bit_rate", "-of", "default=noprint_wrappers=1:nokey=1", filename],
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, check=True
+    )
+    return float(result.stdout) / 1000
+
+
+def autotune(seconds: float = 20.0, min_ssim: float | None = 0.97, max_kbps: float | None = None, fixtures_dir: str = ".cache/bench") -> dict:
+    """
+    Render the same benchmark sample with every profile on this host, score it
+    against a high-quality reference render, and pick the fastest profile whose
+    SSIM is at least min_ssim and whose bitrate is at most max_kbps. The choice
+    is saved so later renders on this host use it by default.
+    """
+    # imported here: main.py imports this module and must not pay for benchmark's imports
+    from benchmark import make_fixtures, sample_processor
+
+    fixtures = make_fixtures(fixtures_dir, seconds)
+    work_dir = os.path.join(fixtures_dir, "autotune")
+    os.makedirs(work_dir, exist_ok=True)
+
+    def render(profile: RenderProfile) -> tuple:
+        processor = sample_processor(fixtures, seconds, work_dir)
+        processor.output_file = os.path.join(work_dir, f"{profile.name}.mp4")
+        processor.profile = profile
+        processor.generate_captions()
+        start = time.perf_counter()
+        processor.render(random_start=False)
+        wall = time.perf_counter() - start
+        processor.cleanup()
+        return processor.output_file, wall
+
+    print("Rendering reference sample...")
+    reference, _ = render(_REFERENCE)
+
+    results = {}
+    for name in _SPEED_ORDER:
+        output, wall = render(RENDER_PROFILES[name])
+        results[name] = {
+            "wall_s": wall,
+            "throughput": seconds / wall,
+            "ssim": _ssim(output, reference),
+            "kbps": _bitrate_kbps(output),
+        }
+        print(f"{name:<10} {wall:6.2f}s  {seconds / wall:6.2f} video s/s  SSIM {results[name]['ssim']:.4f}  {results[name]['kbps']:.0f} kb/s")
+
+    passing = [
+        name for name in _SPEED_ORDER
+        if (min_ssim is None or results[name]["ssim"] >= min_ssim)
+        and (max_kbps is None or results[name]["kbps"] <= max_kbps)
+    ]
+    if not passing:
+        print("No profile meets the target, keeping 'publish'")
+    # the order above is only a guess at speed; measured throughput decides
+    best = max(passing, key=lambda name: results[name]["throughput"]) if passing else "publish"
+
+    choice = {
+        "profile": best, "host": platform.node(), "cpus": os.cpu_count(),
+        "min_ssim": min_ssim, "max_kbps": max_kbps, "results": results
+    }
+    os.makedirs(os.path.dirname(TUNED_PROFILE_FILE), exist_ok=True)
+    with open(TUNED_PROFILE_FILE, "w", encoding="utf-8") as f:
+        json.dump(choice, f, indent=2)
+    print(f"Selected render profile '{best}' (saved to {TUNED_PROFILE_FILE})")
+    return choice
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render profiles for the final encode.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="Show the available profiles")
+    tune = commands.add_parser("autotune", help="Pick the fastest profile meeting a quality/bitrate target on this host")
+    tune.add_argument("--seconds", type=float, default=20.0, help="Length of the sample render")
+    tune.add_argument("--min-ssim", type=float, default=0.97, help="Lowest acceptable SSIM against a slow, CRF 16 reference")
+    tune.add_argument("--max-kbps", type=float, help="Highest acceptable video bitrate in kb/s")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for profile in RENDER_PROFILES.values():
+            print(profile.to_dict())
+    else:
+        autotune(args.seconds, args.min_ssim, args.max_kbps)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+import os
+import json
+import time
+import random
+import hashlib
+import tempfile
+import http.client
+from urllib.parse import urlsplit, urlencode
+
+_RETRY_STATUSES = (500, 502, 503, 504)
+_GRANULARITY = 256 * 1024  # chunk sizes must be multiples of this, except the last chunk
+
+class UploadError(Exception):
+    def __init__(self, status: int, body: str):
+        super().__init__(f"Upload failed with HTTP {status}: {body[:500]}")
+        self.status = status
+        self.body = body
+
+class ResumableUpload:
+    def __init__(
+        self,
+        video_file: str,
+        session_file: str,
+        upload_url: str = "https://www.googleapis.com/upload/youtube/v3/videos",
+        auth_headers=None,
+        chunk_size: int = 8 * 1024 * 1024,
+        max_retries: int = 8,
+        backoff_seconds: float = 1.0,
+        max_backoff_seconds: float = 64.0,
+        timeout: float = 120.0
+    ):
+        """
+        Client for the YouTube resumable upload protocol. The session URI and the
+        confirmed byte offset are saved to session_file after every chunk, so a
+        worker that crashed or was restarted carries on where it stopped instead
+        of sending the video again from byte 0.
+
+        Args:
+            video_file (str): Path to the video file to upload.
+            session_file (str): JSON file the upload session is persisted in.
+            upload_url (str): Upload endpoint; point it at a local fake server for tests.
+            auth_headers (callable, optional): Returns fresh Authorization headers for each request.
+            chunk_size (int): Bytes per request, rounded to a multiple of 256 KiB.
+                0 sends the rest of the file in a single request.
+            max_retries (int): Consecutive failures tolerated on 5xx or connection errors.
+            backoff_seconds (float): First retry delay; doubles on every retry, with jitter.
+            max_backoff_seconds (float): Upper bound of a retry delay.
+            timeout (float): Socket timeout per request in seconds.
+        """
+        self.video_file = video_file
+        self.session_file = session_file
+        self.upload_url = upload_url
+        self.auth_headers = auth_headers or (lambda: {})
+        self.chunk_size = max(_GRANULARITY, chunk_size - chunk_size % _GRANULARITY) if chunk_size > 0 else 0
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.timeout = timeout
+        self.file_size = os.path.getsize(video_file)
+        self.metrics = {}
+
+    def _request(self, method: str, url: str, body: bytes = b"", headers: dict | None = None) -> tuple:
+        """Send one request and return (status, headers, body text)."""
+        parts = urlsplit(url)
+        connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        connection = connection_class(parts.netloc, timeout=self.timeout)
+        try:
+            path = parts.path + (f"?{parts.query}" if parts.query else "")
+            all_headers = {**self.auth_headers(), **(headers or {}), "Content-Length": str(len(body))}
+            connection.request(method, path, body=body, headers=all_headers)
+            response = connection.getresponse()
+            return response.status, {k.lower(): v for k, v in response.getheaders()}, response.read().decode("utf-8", "replace")
+        finally:
+            connection.close()
+
+    def _fingerprint(self) -> str:
+        # by content, not mtime: a resumed job restores the same video from the cache as a new file
+        digest = hashlib.sha256()
+        with open(self.video_file, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _load_session(self) -> dict | None:
+        if not os.path.exists(self.session_file):
+            return None
+        with open(self.session_file, "r", encoding="utf-8") as f:
+            session = json.load(f)
+        # a re-rendered video is a different upload
+        if session.get("file_size") != self.file_size or session.get("sha256") != self._fingerprint():
+            return None
+        return session
+
+    def _save_session(self, session: dict):
+        folder = os.path.dirname(self.session_file) or "."
+        os.makedirs(folder, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=folder, suffix=".part")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(session, f)
+        os.replace(tmp, self.session_file)
+
+    def _clear_session(self):
+        if os.path.exists(self.session_file):
+            os.remove(self.session_file)
+
+    def _start_session(self, metadata: dict, params: dict) -> dict:
+        """Open a new upload session and persist its URI."""
+        status, headers, body = self._request(
+            "POST",
+            f"{self.upload_url}?{urlencode({'uploadType': 'resumable', **params})}",
+            json.dumps(metadata).encode("utf-8"),
+            {
+                "Content-Type": "application/json; charset=UTF-8",
+                "X-Upload-Content-Length": str(self.file_size),
+                "X-Upload-Content-Type": "video/*",
+            }
+        )
+        if status != 200 or "location" not in headers:
+            raise UploadError(status, body)
+        session = {"uri": headers["location"], "offset": 0, "file_size": self.file_size, "sha256": self._fingerprint()}
+        self._save_session(session)
+        return session
+
+    def _next_offset(self, headers: dict) -> int:
+        """Byte offset after a 308 response: the server's Range is the last byte it has, inclusive."""
+        received = headers.get("range")
+        return int(received.rsplit("-", 1)[1]) + 1 if received else 0
+
+    def _query_offset(self, session: dict) -> tuple:
+        """Ask the server how much of the file it has. Returns (offset, response or None)."""
+        status, headers, body = self._request(
+            "PUT", session["uri"], headers={"Content-Range": f"bytes */{self.file_size}"}
+        )
+        if status in (200, 201):
+            return self.file_size, json.loads(body)
+        if status == 308:
+            return self._next_offset(headers), None
+        raise UploadError(status, body)
+
+    def _backoff(self, attempt: int):
+        delay = min(self.max_backoff_seconds, self.backoff_seconds * 2 ** attempt) * random.uniform(0.5, 1.0)
+        print(f"Upload interrupted, retrying in {delay:.1f}s (attempt {attempt + 1}/{self.max_retries})")
+        time.sleep(delay)
+
+    def upload(self, metadata: dict, params: dict) -> dict:
+        """
+        Upload the video (resuming a saved session when there is one) and return
+        the API response. Transient failures are retried with exponential backoff;
+        the session file is removed once the upload is complete.
+        """
+        session = self._load_session()
+        if session:
+            print(f"Resuming upload of {self.video_file} at byte {session['offset']}")
+        started = time.time()
+        sent = retries = attempt = 0
+        response = None
+        needs_sync = session is not None  # the saved offset may lag behind the server
+
+        while response is None:
+            try:
+                if session is None:
+                    session = self._start_session(metadata, params)
+                if needs_sync:
+                    session["offset"], response = self._query_offset(session)
+                    self._save_session(session)
+                    needs_sync = False
+                    continue
+
+                start = session["offset"]
+                size = self.chunk_size or self.file_size - start
+                with open(self.video_file, "rb") as f:
+                    f.seek(start)
+                    chunk = f.read(size)
+                end = start + len(chunk) - 1
+                status, headers, body = self._request(
+                    "PUT", session["uri"], chunk,
+                    {"Content-Type": "video/*", "Content-Range": f"bytes {start}-{end}/{self.file_size}"}
+                )
+                if status in (200, 201):
+                    sent += len(chunk)
+                    response = json.loads(body)
+                elif status == 308:
+                    session["offset"] = self._next_offset(headers)
+                    sent += session["offset"] - start
+                    self._save_session(session)
+                    attempt = 0
+                    print(f"Uploaded {int(session['offset'] * 100 / self.file_size)}%")
+                else:
+                    raise UploadError(status, body)
+            except (UploadError, OSError, http.client.HTTPException) as e:
+                status = getattr(e, "status", None)
+                # 404/410 on an open session means it expired; from the session POST
+                # (session is still None then) it is a real error and is raised
+                expired = session is not None and status in (404, 410)
+                # connection errors have no status and are always worth another try
+                retryable = expired or status is None or status in _RETRY_STATUSES
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                if expired:
+                    print("Upload session expired, starting a new one")
+                    self._clear_session()
+                    session = None
+                else:
+                    print(f"Upload error: {e}")
+                self._backoff(attempt)
+                attempt, retries, needs_sync = attempt + 1, retries + 1, session is not None
+
+        self._clear_session()
+        elapsed = time.time() - started
+        self.metrics = {
+            "bytes": self.file_size,
+            "bytes_sent": sent,
+            "seconds": elapsed,
+            "mb_per_second": sent / 1024 ** 2 / elapsed if elapsed else 0.0,
+            "retries": retries,
+            "chunk_size": self.chunk_size,
+        }
+        print(f"Upload completed: {sent / 1024 ** 2:.1f} MB in {elapsed:.1f}s ({self.metrics['mb_per_second']:.2f} MB/s, {retries} retries)")
+        return response
@@ -0,0 +1,85 @@
+import queue
+import threading
+
+_DONE = object()
+
+class StageScheduler:
+    def __init__(self, stages: list, queue_size: int = 2):
+        """
+        Runs jobs through a chain of stages connected by bounded queues, so
+        different stages work on different jobs at the same time: story N+1
+        can synthesize while story N renders and story N-1 uploads.
+
+        Args:
+            stages (list): (name, fn, workers) tuples in pipeline order. fn(job) is
+                called on one of the stage's worker threads.
+            queue_size (int): Jobs allowed to wait in front of each stage. A full
+                queue blocks the stage before it (backpressure).
+        """
+        self.stages = stages
+        self.queue_size = queue_size
+
+    def run(self, jobs: list, on_success=None, on_failure=None) -> int:
+        """
+        Push jobs through every stage. A job whose stage raises is dropped from
+        the pipeline and reported; the other jobs carry on. on_success(job) and
+        on_failure(job, stage name, error) are called as jobs finish; an error
+        raised by a callback is logged and does not stop the stage's worker.
+        Returns the failure count.
+        """
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        lock = threading.Lock()
+        failures = []
+
+        def callback(label: str, fn, job, *args):
+            # a worker thread that died here would leave its queue unread and hang the pipeline
+            try:
+                fn(job, *args)
+            except Exception as e:
+                print(f"Job {job.get('id')}: {label} callback failed: {e}")
+
+        def worker(index: int):
+            name, fn, _ = self.stages[index]
+            inbox = queues[index]
+            outbox = queues[index + 1] if index + 1 < len(queues) else None
+            while True:
+                job = inbox.get()
+                if job is _DONE:
+                    return
+                try:
+                    fn(job)
+                except Exception as e:
+                    print(f"Job {job.get('id')} failed in stage '{name}': {e}")
+                    with lock:
+                        failures.append(job)
+                    if on_failure:
+                        callback("on_failure", on_failure, job, name, e)
+                    continue
+                if outbox is not None:
+                    outbox.put(job)
+                elif on_success:
+                    callback("on_success", on_success, job)
+
+        threads = []
+        for index, (name, _, workers) in enumerate(self.stages):
+            stage_threads = [
+                threading.Thread(target=worker, args=(index,), name=f"{name}-{n}", daemon=True)
+                for n in range(workers)
+            ]
+            for thread in stage_threads:
+                thread.start()
+            threads.append(stage_threads)
+
+        for job in jobs:
+            queues[0].put(job)  # blocks while the first stage is backed up
+
+        # drain stage by stage: once every worker of a stage has exited, nothing
+        # more can reach the next stage, so it can be told to finish too
+        for index, stage_threads in enumerate(threads):
+            for _ in stage_threads:
+                queues[index].put(_DONE)
+            for thread in stage_threads:
+                thread.join()
+
+        print(f"Pipeline finished: {len(jobs) - len(failures)} succeeded, {len(failures)} failed")
+        return len(failures)
@@ -0,0 +1,102 @@
+import os
+import time
+import sqlite3
+import threading
+
+class StoryBuffer:
+    def __init__(self, gemini, prompt: str, db_path: str = ".cache/stories.db", batch_size: int = 5, low_watermark: int = 2, index=None):
+        """
+        Local SQLite buffer of ready-to-use (question, story) pairs per subreddit.
+        Stories are fetched from Gemini batch_size at a time, and a background
+        refill starts when a subreddit's stock drops below low_watermark, so jobs
+        rarely wait on the LLM.
+
+        Args:
+            gemini: Client with query_stories(prompt, count).
+            prompt (str): Prompt template containing {subreddit}.
+            db_path (str): SQLite file; safe to share between worker processes.
+            batch_size (int): Stories requested per Gemini call.
+            low_watermark (int): Stock level that triggers a background refill.
+            index (StoryIndex, optional): Near-duplicates of past stories are not buffered.
+        """
+        self.gemini = gemini
+        self.prompt = prompt
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.low_watermark = low_watermark
+        self.index = index
+        self._refilling = set()
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS stories ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, subreddit TEXT NOT NULL, "
+                "question TEXT NOT NULL, story TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS stories_subreddit ON stories (subreddit, id)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def count(self, subreddit: str) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM stories WHERE subreddit = ?", (subreddit,)).fetchone()[0]
+
+    def refill(self, subreddit: str) -> int:
+        """Fetch one batch of stories for subreddit from Gemini. Returns how many were stored."""
+        stories = self.gemini.query_stories(self.prompt.replace("{subreddit}", subreddit), self.batch_size)
+        if self.index is not None:
+            stories = [(q, s) for q, s in stories if self.index.find_duplicate(q, s) is None]
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO stories (subreddit, question, story, created) VALUES (?, ?, ?, ?)",
+                [(subreddit, q, s, now) for q, s in stories]
+            )
+        print(f"Buffered {len(stories)} new stories for {subreddit}")
+        return len(stories)
+
+    def _refill_in_background(self, subreddit: str):
+        with self._lock:
+            if subreddit in self._refilling:
+                return
+            self._refilling.add(subreddit)
+
+        def run():
+            try:
+                self.refill(subreddit)
+            except Exception as e:
+                print(f"Background refill for {subreddit} failed: {e}")
+            finally:
+                with self._lock:
+                    self._refilling.discard(subreddit)
+        threading.Thread(target=run, daemon=True).start()
+
+    def _take(self, subreddit: str):
+        """Atomically remove and return the oldest buffered story, or None."""
+        conn = self._connect()
+        try:
+            conn.isolation_level = None
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, question, story FROM stories WHERE subreddit = ? ORDER BY id LIMIT 1", (subreddit,)
+            ).fetchone()
+            if row:
+                conn.execute("DELETE FROM stories WHERE id = ?", (row[0],))
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        return (row[1], row[2]) if row else None
+
+    def pop(self, subreddit: str, attempts: int = 3) -> tuple:
+        """Return a (question, story) for subreddit, refilling synchronously only if the buffer is empty."""
+        for _ in range(attempts):
+            entry = self._take(subreddit)
+            if entry:
+                if self.count(subreddit) < self.low_watermark:
+                    self._refill_in_background(subreddit)
+                return entry
+            self.refill(subreddit)
+        raise RuntimeError(f"Could not get a valid story for {subreddit} after {attempts} Gemini requests")
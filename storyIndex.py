@@ -0,0 +1,157 @@
+import os
+import re
+import time
+import zlib
+import random
+import sqlite3
+import struct
+import threading
+
+_PRIME = (1 << 61) - 1
+
+class StoryIndex:
+    def __init__(self, db_path: str = ".cache/storyIndex.db", num_perm: int = 64, bands: int = 16, threshold: float = 0.5, shingle_size: int = 5):
+        """
+        Persistent near-duplicate index over past (question, story) pairs using
+        MinHash signatures of word shingles and LSH banding. Lookups only touch
+        the few entries that share a band bucket, so they stay sub-millisecond
+        with tens of thousands of stories.
+
+        Args:
+            db_path (str): SQLite file holding the signatures; shared by worker processes.
+            num_perm (int): MinHash permutations per signature.
+            bands (int): LSH bands; num_perm / bands rows each. 16 x 4 puts the
+                candidate threshold near 50% similarity.
+            threshold (float): Estimated Jaccard similarity at which a story counts as a duplicate.
+            shingle_size (int): Words per shingle.
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.db_path = db_path
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+
+        # fixed seed so every process hashes the same way
+        rng = random.Random(1234567)
+        self._perms = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+
+        self._lock = threading.Lock()
+        self._signatures = {}  # entry id -> signature tuple
+        self._buckets = {}     # (band, band hash) -> set of entry ids
+        self._last_id = 0
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS stories ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, subreddit TEXT, question TEXT NOT NULL, "
+                "signature BLOB NOT NULL, created REAL NOT NULL)"
+            )
+        self.refresh()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _shingles(self, text: str) -> set:
+        words = re.findall(r"[a-z0-9']+", text.lower())
+        if len(words) < self.shingle_size:
+            return {zlib.crc32(" ".join(words).encode())}
+        return {
+            zlib.crc32(" ".join(words[i:i + self.shingle_size]).encode())
+            for i in range(len(words) - self.shingle_size + 1)
+        }
+
+    def signature(self, question: str, story: str) -> tuple:
+        """MinHash signature of a question/story pair."""
+        shingles = self._shingles(f"{question} {story}")
+        return tuple(min((a * h + b) % _PRIME for h in shingles) for a, b in self._perms)
+
+    def _band_keys(self, signature: tuple):
+        for band in range(self.bands):
+            rows = signature[band * self.rows:(band + 1) * self.rows]
+            yield band, zlib.crc32(struct.pack(f"{self.rows}Q", *rows))
+
+    def _insert(self, entry_id: int, signature: tuple):
+        self._signatures[entry_id] = signature
+        for key in self._band_keys(signature):
+            self._buckets.setdefault(key, set()).add(entry_id)
+
+    def _refresh(self, conn: sqlite3.Connection):
+        """Load entries added since the last refresh; the caller holds self._lock."""
+        rows = conn.execute("SELECT id, signature FROM stories WHERE id > ? ORDER BY id", (self._last_id,)).fetchall()
+        for entry_id, blob in rows:
+            self._insert(entry_id, struct.unpack(f"{self.num_perm}Q", blob))
+            self._last_id = entry_id
+
+    def _find(self, signature: tuple) -> int | None:
+        """Id of a loaded near-duplicate of signature; the caller holds self._lock."""
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates |= self._buckets.get(key, set())
+        for entry_id in candidates:
+            other = self._signatures[entry_id]
+            similarity = sum(x == y for x, y in zip(signature, other)) / self.num_perm
+            if similarity >= self.threshold:
+                return entry_id
+        return None
+
+    def _add(self, conn: sqlite3.Connection, subreddit: str, question: str, signature: tuple) -> int:
+        """Write a signature to the database; the caller holds self._lock, commits, then _insert()s it."""
+        cursor = conn.execute(
+            "INSERT INTO stories (subreddit, question, signature, created) VALUES (?, ?, ?, ?)",
+            (subreddit, question, struct.pack(f"{self.num_perm}Q", *signature), time.time())
+        )
+        return cursor.lastrowid
+
+    def refresh(self):
+        """Load entries added since the last refresh (e.g. by other worker processes)."""
+        with self._lock, self._connect() as conn:
+            self._refresh(conn)
+
+    def find_duplicate(self, question: str, story: str, signature: tuple | None = None) -> int | None:
+        """Return the id of a stored near-duplicate of this story, or None."""
+        signature = signature or self.signature(question, story)
+        with self._lock, self._connect() as conn:
+            self._refresh(conn)
+            return self._find(signature)
+
+    def add(self, subreddit: str, question: str, story: str, signature: tuple | None = None) -> int:
+        """Store a story so later near-duplicates of it are rejected."""
+        signature = signature or self.signature(question, story)
+        with self._lock:
+            with self._connect() as conn:
+                entry_id = self._add(conn, subreddit, question, signature)
+            self._insert(entry_id, signature)
+        return entry_id
+
+    def check_and_add(self, subreddit: str, question: str, story: str) -> bool:
+        """
+        Add the story unless it is a near-duplicate. Returns True if it was new.
+        The check and the insert are one step, for threads of this process (the
+        lock) and for other processes (an immediate write transaction), so two
+        near-identical stories arriving together cannot both pass.
+        """
+        signature = self.signature(question, story)
+        with self._lock:
+            conn = self._connect()
+            conn.isolation_level = None  # transactions are begun and ended explicitly below
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    self._refresh(conn)
+                    if self._find(signature) is not None:
+                        conn.execute("ROLLBACK")
+                        return False
+                    entry_id = self._add(conn, subreddit, question, signature)
+                    conn.execute("COMMIT")
+                except BaseException:
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK")
+                    raise
+            finally:
+                conn.close()
+            self._insert(entry_id, signature)
+        return True
@@ -0,0 +1,108 @@
+import os
+import json
+import random
+import tempfile
+import threading
+import subprocess
+
+class TemplateLibrary:
+    def __init__(self, index_file: str = ".cache/templates.json"):
+        """
+        Persisted index of the background template videos: duration, resolution,
+        fps and keyframe timestamps. Entries are re-probed only when a file's
+        mtime or size changes, so jobs never spawn ffprobe for templates.
+
+        Args:
+            index_file (str): JSON file the index is kept in.
+        """
+        self.index_file = index_file
+        self._lock = threading.Lock()
+        self.index = {}
+        if os.path.exists(index_file):
+            with open(index_file, "r", encoding="utf-8") as f:
+                self.index = json.load(f)
+
+    def _probe(self, path: str) -> dict:
+        """Read stream metadata and keyframe times of a video with ffprobe."""
+        result = subprocess.run(
+            [
+                "ffprobe", "-v", "error", "-select_streams", "v:0",
+                "-show_entries", "stream=width,height,avg_frame_rate:format=duration",
+                "-of", "json", path
+            ],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True
+        )
+        info = json.loads(result.stdout)
+        stream = info["streams"][0]
+        num, den = stream.get("avg_frame_rate", "0/1").split("/")
+
+        # packet flags are read without decoding, so this stays quick on long templates
+        result = subprocess.run(
+            [
+                "ffprobe", "-v", "error", "-select_streams", "v:0",
+                "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", path
+            ],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True
+        )
+        keyframes = []
+        for line in result.stdout.decode().splitlines():
+            pts_time, _, flags = line.partition(",")
+            if "K" in flags and pts_time not in ("", "N/A"):
+                keyframes.append(float(pts_time))
+
+        return {
+            "duration": float(info["format"]["duration"]),
+            "width": int(stream["width"]),
+            "height": int(stream["height"]),
+            "fps": float(num) / float(den) if float(den) else 0.0,
+            "keyframes": sorted(keyframes),
+        }
+
+    def _save(self):
+        folder = os.path.dirname(self.index_file) or "."
+        os.makedirs(folder, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=folder, suffix=".part")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self.index, f)
+        os.replace(tmp, self.index_file)
+
+    def get(self, path: str) -> dict:
+        """Return the metadata of a template, probing it only if it is new or changed."""
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        with self._lock:
+            entry = self.index.get(key)
+            if entry is None or entry["mtime"] != stat.st_mtime_ns or entry["size"] != stat.st_size:
+                print(f"Indexing template video {path}...")
+                entry = self._probe(path)
+                entry["mtime"] = stat.st_mtime_ns
+                entry["size"] = stat.st_size
+                self.index[key] = entry
+                self._save()
+            return entry
+
+    def warm(self, paths: list) -> threading.Thread:
+        """Index the given templates on a background thread."""
+        def run():
+            for path in paths:
+                try:
+                    self.get(path)
+                except (OSError, subprocess.CalledProcessError) as e:
+                    print(f"Could not index template {path}: {e}")
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def pick_window(self, path: str, duration: float, seed=None) -> float:
+        """
+        Pick a random keyframe-aligned start for a window of the given length,
+        so a stream-copy cut lands exactly where it was asked to.
+        """
+        entry = self.get(path)
+        if duration > entry["duration"]:
+            raise ValueError("Audio file is longer than video!")
+
+        max_start = entry["duration"] - duration
+        candidates = [k for k in entry["keyframes"] if k <= max_start] or [0.0]
+        rng = random.Random(seed) if seed is not None else random
+        return rng.choice(candidates)
@@ -1,23 +1,219 @@
 import os
 import re
+import tempfile
 import subprocess
+import multiprocessing
+from collections import deque
 import torch
-import torchaudio as ta
-from chatterbox.tts import ChatterboxTTS
+from concurrent.futures import ProcessPoolExecutor
+from chatterbox.tts import ChatterboxTTS, Conditionals
+from artifactCache import ArtifactCache
+from profiler import stage
+
+# --- parallel synthesis: each pool process holds its own model ---
+_worker_tts = None
+
+def _init_tts_worker(device: str, exaggeration: float, cfg_weight: float, cache_root: str, threads: int, quantize: bool, compile_model: bool, warmup: bool):
+    global _worker_tts
+    _worker_tts = TextToSpeech(
+        device=device,
+        exaggeration=exaggeration,
+        cfg_weight=cfg_weight,
+        cache=ArtifactCache(cache_root),
+        threads=threads,
+        quantize=quantize,
+        compile_model=compile_model,
+        warmup=warmup
+    )
+
+def _prepare_in_worker(voice: str):
+    _worker_tts._prepare_voice(voice)
+
+def _generate_in_worker(task: tuple) -> torch.Tensor:
+    chunk, voice, seed = task
+    if voice:
+        _worker_tts._prepare_voice(voice)  # persisted before the chunks were submitted, so this is a load
+    return _worker_tts._generate_chunk(chunk, seed)
 
 class TextToSpeech:
     def __init__(
         self,
         device: str | None = None,
-        voice_sample: str | None = None,   # path to your reference WAV (mono, 16/24/48 kHz)
-        exaggeration: float = 0.5,         # emotion/intensity control
-        cfg_weight: float = 0.5            # pacing/expressiveness control
+        voice_sample: str | None = None,     # path to your reference WAV (mono, 16/24/48 kHz)
+        exaggeration: float = 0.5,           # emotion/intensity control
+        cfg_weight: float = 0.5,             # pacing/expressiveness control
+        cache: ArtifactCache | None = None,  # where prepared voice conditionings are persisted
+        workers: int = 1,                    # CPU processes generating chunks in parallel, each with its own model
+        random_seed: int | None = None,      # chunk i is seeded with random_seed + i
+        model=None,                          # preloaded model (or a stand-in for benchmarks)
+        threads: int | None = None,          # torch intra-op threads (CPU); None keeps torch's default
+        quantize: bool = False,              # int8 dynamic quantization of the T3 linear layers (CPU)
+        compile_model: bool = False,         # torch.compile the T3 transformer
+        warmup: bool = False                 # run one short generate at load
     ):
         self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
-        self.model = ChatterboxTTS.from_pretrained(device=self.device)
+        if threads:
+            torch.set_num_threads(threads)
+            try:
+                torch.set_num_interop_threads(1)  # generation is sequential; extra pools only contend
+            except RuntimeError:
+                pass  # can only be set before torch's first parallel work
+        self.model = model or ChatterboxTTS.from_pretrained(device=self.device)
         self.voice_sample = voice_sample
         self.exaggeration = float(exaggeration)
         self.cfg_weight = float(cfg_weight)
+        self.cache = cache or ArtifactCache()
+        self._voice_conds = {}  # (voice sample hash, exaggeration) -> Conditionals
+        self.workers = max(1, int(workers))
+        self.random_seed = random_seed
+        self.threads = threads
+        self.warmup = warmup
+        self.compile_model = compile_model
+        self.quantized = False
+        self.compiled = False
+        self._pool = None
+        if quantize:
+            self.quantize()
+        if self._pooled():
+            # stories of several chunks run on the pool, whose workers compile and warm up
+            # their own models; this one stays resident (workers + 1 models in all) but
+            # only generates single-chunk stories, so it is not compiled or warmed up
+            pass
+        elif compile_model:
+            self.compile()  # warms up as part of compiling
+        elif warmup:
+            self.warm_up()
+
+    def quantize(self):
+        """
+        Swap the T3 text-to-token transformer's Linear layers for int8 dynamically
+        quantized ones. T3 dominates CPU generation time; S3Gen (the vocoder side)
+        stays fp32. Only for CPU: dynamic quantization has no CUDA kernels.
+        """
+        if self.device != "cpu" or self.quantized:
+            return
+        self.model.t3 = torch.ao.quantization.quantize_dynamic(self.model.t3, {torch.nn.Linear}, dtype=torch.qint8)
+        self.quantized = True
+        print("Quantized the TTS transformer to int8")
+
+    def compile(self):
+        """
+        torch.compile the T3 transformer. Compilation happens on the first call, so
+        a warm-up runs right away; if it fails, the eager module is put back.
+        """
+        if self.compiled:
+            return
+        t3 = self.model.t3
+        eager = t3.tfmr
+        try:
+            t3.tfmr = torch.compile(eager, dynamic=True)
+            t3.compiled = False  # T3 wraps tfmr for generation once; make it wrap the compiled one
+            self.warm_up()
+            self.compiled = True
+            print("Compiled the TTS transformer")
+        except Exception as e:
+            t3.tfmr = eager
+            t3.compiled = False
+            print(f"torch.compile failed ({e}), running eagerly")
+
+    def warm_up(self):
+        """
+        Generate one short phrase so one-time costs (allocator growth, kernel
+        selection, compilation) are paid at load instead of by the first chunk.
+        """
+        if self.voice_sample:
+            self._prepare_voice(self.voice_sample)
+        self._generate_chunk("Warming up the voice.")  # unseeded: a fixed seed here would reset the global RNG of every load
+
+    def _pooled(self) -> bool:
+        return self.workers > 1 and self.device == "cpu"
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Start the chunk-generation pool on first use; it lives as long as this object."""
+        if self._pool is None:
+            threads = max(1, (os.cpu_count() or 1) // self.workers)
+            print(f"Starting {self.workers} TTS worker processes with {threads} torch threads each")
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_tts_worker,
+                initargs=(self.device, self.exaggeration, self.cfg_weight, self.cache.root, threads, self.quantized, self.compile_model, self.warmup)
+            )
+        return self._pool
+
+    def _pool_results(self, tasks: list):
+        """
+        Results of _generate_in_worker for tasks, in order. Only a chunk per
+        worker plus one more is in flight at a time, so results a slow consumer
+        has not taken yet never pile up for the whole story.
+        """
+        pool = self._get_pool()
+        tasks = iter(tasks)
+        pending = deque()
+        for task in tasks:
+            pending.append(pool.submit(_generate_in_worker, task))
+            if len(pending) > self.workers:
+                break
+        while pending:
+            wav = pending.popleft().result()
+            task = next(tasks, None)
+            if task is not None:
+                pending.append(pool.submit(_generate_in_worker, task))
+            yield wav
+
+    def close(self):
+        """Shut down the parallel synthesis pool, if one was started."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _generate_chunk(self, chunk: str, seed: int | None = None) -> torch.Tensor:
+        """Generate one chunk as a 1-D mono tensor; a seed makes it reproducible."""
+        if seed is not None:
+            torch.manual_seed(seed)
+        with torch.inference_mode():
+            wav = self.model.generate(
+                chunk,
+                exaggeration=self.exaggeration,
+                cfg_weight=self.cfg_weight,
+            )
+        # normalize to 1-D mono tensor [T]
+        if isinstance(wav, torch.Tensor):
+            if wav.dim() == 2:
+                if wav.size(0) > 1:  # downmix stereo if any
+                    wav = wav.mean(dim=0, keepdim=True)
+                wav = wav.squeeze(0)
+        else:
+            wav = torch.tensor(wav)
+        return wav
+
+    def _prepare_voice(self, voice_sample: str):
+        """
+        Load the speaker/emotion conditioning for voice_sample into the model.
+        It is computed once per (file hash, exaggeration), kept in memory and
+        persisted in the artifact cache so later runs and other workers reuse it.
+        """
+        voice_hash = self.cache.file_hash(voice_sample)
+        memo = (voice_hash, self.exaggeration)
+        if memo not in self._voice_conds:
+            key = self.cache.key("voice", voice_hash, self.exaggeration)
+            path = self.cache.get(key, ".pt")
+            if path:
+                conds = Conditionals.load(path, map_location=self.device).to(self.device)
+                print(f"Loaded cached voice conditioning for {voice_sample}")
+            else:
+                self.model.prepare_conditionals(voice_sample, exaggeration=self.exaggeration)
+                conds = self.model.conds
+                fd, tmp = tempfile.mkstemp(suffix=".pt")
+                os.close(fd)
+                try:
+                    conds.save(tmp)
+                    self.cache.put(key, tmp, ".pt")
+                finally:
+                    os.remove(tmp)
+                print(f"Prepared voice conditioning for {voice_sample}")
+            self._voice_conds[memo] = conds
+        self.model.conds = self._voice_conds[memo]
 
     def _split_text(self, text: str, max_len: int = 500):
         parts = re.split(r'(?<=[.!?])\s+', text.strip())
@@ -35,6 +231,123 @@ class TextToSpeech:
             chunks.append(buf)
         return chunks
 
+    def _atempo_chain(self, speed: float) -> str | None:
+        """ffmpeg filter for a pitch-preserving speed change, or None at normal speed."""
+        if abs(speed - 1.0) <= 1e-3:
+            return None
+        # chain atempo if speed outside 0.5–2.0
+        s = float(speed)
+        filters = []
+        while s > 2.0:
+            filters.append("atempo=2.0"); s /= 2.0
+        while s < 0.5:
+            filters.append("atempo=0.5"); s /= 0.5
+        filters.append(f"atempo={s:.6f}")
+        return ",".join(filters)
+
+    def _encoder_command(self, sr: int, output_file: str, speed: float) -> list:
+        """
+        ffmpeg command that reads raw float32 mono PCM on stdin, applies the
+        speed change and encodes output_file in one pass. .m4a/.aac outputs are
+        encoded as AAC so the video mux can stream-copy them.
+        """
+        cmd = ["ffmpeg", "-y", "-f", "f32le", "-ar", str(sr), "-ac", "1", "-i", "pipe:0"]
+        chain = self._atempo_chain(speed)
+        if chain:
+            cmd += ["-filter:a", chain]
+        if output_file.lower().endswith((".m4a", ".aac")):
+            cmd += ["-c:a", "aac", "-b:a", "192k"]
+        cmd.append(output_file)
+        return cmd
+
+    def _pcm(self, wav: torch.Tensor) -> bytes:
+        """Raw float32 samples in the layout _encoder_command expects."""
+        return wav.detach().to(torch.float32).cpu().contiguous().numpy().tobytes()
+
+    def _encode(self, wav: torch.Tensor, sr: int, output_file: str, speed: float):
+        """Stream the waveform to a single ffmpeg process; no temporary WAVs touch the disk."""
+        with stage("ffmpeg.encode_audio"):
+            result = subprocess.run(
+                self._encoder_command(sr, output_file, speed), input=self._pcm(wav),
+                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+            )
+        if result.returncode:
+            stderr = result.stderr.decode("utf-8", "replace")
+            print(f"ffmpeg error: {stderr or 'No stderr available'}")
+            raise subprocess.CalledProcessError(result.returncode, result.args, stderr=stderr)
+
+    def _split_chunks(self, t: str, limit: int):
+        t = re.sub(r"\s+", " ", t.strip())
+        # split on end punctuation but keep it
+        parts = re.split(r"(?<=[\.\!\?\:\;])\s+", t)
+        chunks, buf = [], ""
+        for p in parts:
+            if not p:
+                continue
+            if len(buf) + len(p) + 1 <= limit:
+                buf = (buf + " " + p).strip() if buf else p
+            else:
+                if buf:
+                    chunks.append(buf)
+                buf = p
+        if buf:
+            chunks.append(buf)
+        return chunks if chunks else [t]
+
+    def _trim_silence(self, wav_1d: torch.Tensor, sr: int, db_thresh: float, margin_ms: float):
+        if wav_1d.numel() == 0:
+            return wav_1d
+        amp_thresh = 10 ** (db_thresh / 20.0)
+        x = wav_1d.abs()
+        idx = torch.where(x >= amp_thresh)[0]
+        if idx.numel() == 0:
+            return wav_1d  # all near-silence; keep as-is
+        pad = int(sr * (margin_ms / 1000.0))
+        start = max(int(idx[0]) - pad, 0)
+        end = min(int(idx[-1]) + pad, wav_1d.numel() - 1)
+        return wav_1d[start:end + 1]
+
+    def stream_chunks(
+        self,
+        text: str,
+        voice_sample: str | None = None,
+        max_len: int = 700,
+        trim_db: float = -45.0,
+        trim_margin_ms: float = 30.0
+    ):
+        """Yield (chunk text, trimmed 1-D waveform) for each chunk of text, in order, as soon as it is ready."""
+        chunks = self._split_chunks(text, max_len)
+        sr = self.model.sr
+
+        pooled = self._pooled() and len(chunks) > 1
+
+        # condition on the reference voice once, not once per chunk
+        voice = voice_sample or self.voice_sample
+        if voice:
+            if pooled:
+                # one worker prepares and persists it; the others load it from the cache
+                self._get_pool().submit(_prepare_in_worker, voice).result()
+            else:
+                self._prepare_voice(voice)
+
+        # per-chunk seeds keep output identical whether chunks run in order or in parallel
+        if self.random_seed is None:
+            seeds = [None] * len(chunks)
+        else:
+            seeds = [int(self.random_seed) + i for i in range(len(chunks))]
+
+        if pooled:
+            wavs = self._pool_results([(c, voice, seed) for c, seed in zip(chunks, seeds)])
+        else:
+            wavs = (self._generate_chunk(c, seed) for c, seed in zip(chunks, seeds))
+
+        wavs = iter(wavs)
+        for index, chunk in enumerate(chunks):
+            # with a pool this is the wait for the chunk's result
+            with stage("tts.chunk", index=index, chars=len(chunk)):
+                wav = next(wavs)
+            yield chunk, self._trim_silence(wav, sr, trim_db, trim_margin_ms)
+
     def synthesize(
         self,
         text: str,
@@ -46,111 +359,70 @@ class TextToSpeech:
         trim_margin_ms: float = 30.0  # protect phoneme onsets/ends
     ):
         """
-        Auto-chunk → per-chunk silence trim → concat → pitch-preserving speed → MP3.
-        Produces a single continuous file with minimal gaps.
-        """
-        import re
-        import subprocess
-        import os
-        import torch
-        import torchaudio as ta
-
-        if getattr(self, "random_seed", None) is not None:
-            torch.manual_seed(int(self.random_seed))
-
-        # --- helpers (local) ---
-        def split_text(t: str, limit: int):
-            t = re.sub(r"\s+", " ", t.strip())
-            # split on end punctuation but keep it
-            parts = re.split(r"(?<=[\.\!\?\:\;])\s+", t)
-            chunks, buf = [], ""
-            for p in parts:
-                if not p:
-                    continue
-                if len(buf) + len(p) + 1 <= limit:
-                    buf = (buf + " " + p).strip() if buf else p
-                else:
-                    if buf:
-                        chunks.append(buf)
-                    buf = p
-            if buf:
-                chunks.append(buf)
-            return chunks if chunks else [t]
-
-        def trim_silence(wav_1d: torch.Tensor, sr: int, db_thresh: float, margin_ms: float):
-            if wav_1d.numel() == 0:
-                return wav_1d
-            amp_thresh = 10 ** (db_thresh / 20.0)
-            x = wav_1d.abs()
-            idx = torch.where(x >= amp_thresh)[0]
-            if idx.numel() == 0:
-                return wav_1d  # all near-silence; keep as-is
-            pad = int(sr * (margin_ms / 1000.0))
-            start = max(int(idx[0]) - pad, 0)
-            end = min(int(idx[-1]) + pad, wav_1d.numel() - 1)
-            return wav_1d[start:end + 1]
-
+        Auto-chunk → per-chunk silence trim → concat → pitch-preserving speed → MP3/AAC.
+        Produces a single continuous file with minimal gaps; the audio is piped
+        straight into one ffmpeg process. Returns the narration length in seconds.
+        """
         # --- chunk, synthesize, trim, concat ---
-        chunks = split_text(text, max_len)
-        sr = self.model.sr
-        pieces = []
-
-        with torch.no_grad():
-            for chunk in chunks:
-                wav = self.model.generate(
-                    chunk,
-                    audio_prompt_path=voice_sample or self.voice_sample,
-                    exaggeration=self.exaggeration,
-                    cfg_weight=self.cfg_weight,
-                )
-                # normalize to 1-D mono tensor [T]
-                if isinstance(wav, torch.Tensor):
-                    if wav.dim() == 2:
-                        if wav.size(0) > 1:  # downmix stereo if any
-                            wav = wav.mean(dim=0, keepdim=True)
-                        wav = wav.squeeze(0)
-                else:
-                    wav = torch.tensor(wav)
-
-                wav = trim_silence(wav, sr, trim_db, trim_margin_ms)
-                pieces.append(wav)
+        pieces = [wav for _, wav in self.stream_chunks(text, voice_sample, max_len, trim_db, trim_margin_ms)]
 
         if not pieces:
             raise RuntimeError("No audio generated.")
 
         full = torch.cat(pieces)
-        temp_wav = "tempOutput.wav"
-        temp_fast_wav = "tempFast.wav"
-
-        ta.save(temp_wav, full.unsqueeze(0), sr)
-        print(f"Synthesized speech saved to {temp_wav} (single continuous file)")
-
-        # --- pitch-preserving speed change + MP3 transcode ---
-        if abs(speed - 1.0) > 1e-3:
-            # chain atempo if speed outside 0.5–2.0
-            s = float(speed)
-            filters = []
-            while s > 2.0:
-                filters.append("atempo=2.0"); s /= 2.0
-            while s < 0.5:
-                filters.append("atempo=0.5"); s /= 0.5
-            filters.append(f"atempo={s:.6f}")
-            chain = ",".join(filters)
-
-            subprocess.run(
-                ["ffmpeg", "-y", "-i", temp_wav, "-filter:a", chain, temp_fast_wav],
-                check=True, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT
-            )
-            subprocess.run(
-                ["ffmpeg", "-y", "-i", temp_fast_wav, output_file],
-                check=True, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT
-            )
-            os.remove(temp_fast_wav)
-        else:
-            subprocess.run(
-                ["ffmpeg", "-y", "-i", temp_wav, output_file],
-                check=True, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT
-            )
+        self._encode(full, self.model.sr, output_file, speed)
+        print(f"Final Audio File Saved as {output_file}")
+        return full.numel() / self.model.sr / speed
+
+    def synthesize_stream(
+        self,
+        text: str,
+        output_file: str,
+        speed: float = 1.0,
+        voice_sample: str | None = None,
+        on_chunk=None,
+        max_len: int = 700,
+        trim_db: float = -45.0,
+        trim_margin_ms: float = 30.0
+    ) -> float:
+        """
+        Streaming variant of synthesize: every trimmed chunk is written to the
+        running ffmpeg encoder as soon as it is generated, so memory stays bounded
+        by chunk size. on_chunk(text, wav, sr, offset) is called for each chunk,
+        with offset being its start in seconds of the narration before the speed
+        change, so per-chunk work (e.g. caption alignment) can overlap synthesis.
+
+        Returns:
+            float: Duration of the encoded narration in seconds.
+        """
+        sr = self.model.sr
+        cmd = self._encoder_command(sr, output_file, speed)
+        samples = 0
+        # ffmpeg's log goes to a file: a pipe nobody reads until the end would fill up and stall it
+        with tempfile.TemporaryFile() as log:
+            proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=log)
+            try:
+                for chunk, wav in self.stream_chunks(text, voice_sample, max_len, trim_db, trim_margin_ms):
+                    if on_chunk:
+                        on_chunk(chunk, wav, sr, samples / sr)
+                    try:
+                        proc.stdin.write(self._pcm(wav))
+                    except BrokenPipeError:
+                        break  # ffmpeg exited early; its return code and log say why
+                    samples += wav.numel()
+            finally:
+                try:
+                    proc.stdin.close()
+                except BrokenPipeError:
+                    pass
+                returncode = proc.wait()
+            if returncode:
+                log.seek(0)
+                stderr = log.read().decode("utf-8", "replace")
+                print(f"ffmpeg error: {stderr or 'No stderr available'}")
+                raise subprocess.CalledProcessError(returncode, cmd, stderr=stderr)
+        if samples == 0:
+            raise RuntimeError("No audio generated.")
 
-        os.remove(temp_wav)
-        print(f"Final Audio File Saved as {output_file}")
\ No newline at end of file
+        print(f"Final Audio File Saved as {output_file} (streamed)")
+        return samples / sr / speed
@@ -0,0 +1,95 @@
+import os
+from modelRegistry import shared_registry
+
+# the backends' libraries (torch, CTranslate2) are imported when a transcriber is built
+
+class WhisperTranscriber:
+    name = "whisper"
+
+    def __init__(self, model="base", device: str | None = None):
+        """
+        Captions from openai-whisper (PyTorch, fp32 on CPU).
+
+        Args:
+            model: Model size ("tiny", "base", "small", ...) or an already loaded Whisper model.
+            device (str, optional): "cuda" or "cpu"; Whisper picks one when None.
+        """
+        import whisper
+        self.model_size = model if isinstance(model, str) else "custom"
+        self.model = whisper.load_model(model, device=device) if isinstance(model, str) else model
+
+    def transcribe(self, audio_file: str) -> list:
+        """Per-segment word timings: [[{"word", "start", "end"}, ...], ...]."""
+        result = self.model.transcribe(audio_file, word_timestamps=True)
+        return [seg.get("words", []) for seg in result.get("segments", [])]
+
+class FasterWhisperTranscriber:
+    name = "faster-whisper"
+
+    def __init__(self, model: str = "base", device: str = "cpu", compute_type: str = "int8", vad_filter: bool = True, cpu_threads: int = 0):
+        """
+        Captions from faster-whisper: the Whisper weights run on CTranslate2,
+        int8-quantized by default, which is several times faster than
+        openai-whisper on CPU at a fraction of the memory. The Silero VAD filter
+        drops silent stretches before decoding.
+
+        Args:
+            model (str): Model size ("tiny", "base", "small", "distil-large-v3", ...).
+            device (str): "cpu" or "cuda".
+            compute_type (str): CTranslate2 weight type: "int8", "int8_float16", "float16", "float32".
+            vad_filter (bool): Skip silence with voice-activity detection.
+            cpu_threads (int): Threads used on CPU; 0 lets CTranslate2 decide.
+        """
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError:
+            raise ImportError("The faster-whisper caption backend needs 'pip install faster-whisper'") from None
+        self.model_size = model
+        self.vad_filter = vad_filter
+        self.model = WhisperModel(model, device=device, compute_type=compute_type, cpu_threads=cpu_threads)
+
+    def transcribe(self, audio_file: str) -> list:
+        """Per-segment word timings in the same structure as WhisperTranscriber."""
+        segments, _ = self.model.transcribe(audio_file, word_timestamps=True, vad_filter=self.vad_filter)
+        # segments is a lazy generator; decoding happens while it is consumed
+        return [
+            [{"word": w.word, "start": w.start, "end": w.end} for w in (seg.words or [])]
+            for seg in segments
+        ]
+
+TRANSCRIBERS = {
+    WhisperTranscriber.name: WhisperTranscriber,
+    FasterWhisperTranscriber.name: FasterWhisperTranscriber,
+}
+
+def transcriber_config(backend: str | None = None, model: str | None = None) -> tuple:
+    """(backend, model size) of the caption transcriber, filling in the environment's defaults."""
+    backend = backend or os.getenv("CAPTION_BACKEND") or "whisper"
+    model = model or os.getenv("CAPTION_MODEL") or "base"
+    if backend not in TRANSCRIBERS:
+        raise ValueError(f"Unknown caption backend '{backend}', choose from {', '.join(TRANSCRIBERS)}")
+    return backend, model
+
+def load_transcriber(backend: str | None = None, model: str | None = None):
+    """
+    Build the caption transcriber. Arguments left as None come from the
+    environment (.env): CAPTION_BACKEND ("whisper" or "faster-whisper"),
+    CAPTION_MODEL (model size), CAPTION_COMPUTE_TYPE (faster-whisper weight type,
+    default int8) and CAPTION_VAD (0 disables voice-activity filtering).
+    """
+    backend, model = transcriber_config(backend, model)
+    print(f"Loading {backend} ({model}) for captions...")
+    if backend == FasterWhisperTranscriber.name:
+        return FasterWhisperTranscriber(
+            model,
+            compute_type=os.getenv("CAPTION_COMPUTE_TYPE") or "int8",
+            vad_filter=os.getenv("CAPTION_VAD", "1") != "0"
+        )
+    return WhisperTranscriber(model)
+
+def register_transcriber(registry=None, backend: str | None = None, model: str | None = None) -> str:
+    """Declare the configured transcriber in a model registry (the shared one by default). Returns its name there."""
+    backend, model = transcriber_config(backend, model)
+    name = f"transcriber:{backend}:{model}"
+    (registry or shared_registry()).register(name, lambda: load_transcriber(backend, model))
+    return name
@@ -0,0 +1,139 @@
+import os
+import json
+import time
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from fileLock import file_lock
+
+try:
+    _PACIFIC = ZoneInfo("America/Los_Angeles")
+except ZoneInfoNotFoundError:
+    # no tz database (e.g. Windows without tzdata): standard time is close enough
+    _PACIFIC = timezone(timedelta(hours=-8))
+
+# YouTube Data API v3 quota cost per call
+QUOTA_COSTS = {
+    "videos.insert": 1600,
+    "playlists.insert": 50,
+    "playlistItems.insert": 50,
+}
+
+class QuotaTracker:
+    def __init__(self, daily_limit: int = 10000, state_file: str = ".cache/youtubeQuota.json"):
+        """
+        Keeps count of the YouTube API quota units spent today. The quota resets
+        at midnight Pacific time; a reservation that would go over the limit
+        waits for the reset instead of failing halfway through a batch.
+        Reservations hold a lock on the state file, so run_pool worker
+        processes sharing it never spend the same units twice.
+
+        Args:
+            daily_limit (int): Quota units granted per day.
+            state_file (str): JSON file the day's usage is kept in, so restarts don't forget it.
+        """
+        self.daily_limit = daily_limit
+        self.state_file = state_file
+        self._lock = threading.Lock()
+
+    def _today(self) -> str:
+        return datetime.now(_PACIFIC).date().isoformat()
+
+    def _seconds_until_reset(self) -> float:
+        now = datetime.now(_PACIFIC)
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=_PACIFIC)
+        return (midnight - now).total_seconds()
+
+    def _load(self) -> dict:
+        if os.path.exists(self.state_file):
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("day") == self._today():
+                return state
+        return {"day": self._today(), "used": 0}
+
+    def _save(self, state: dict):
+        folder = os.path.dirname(self.state_file) or "."
+        os.makedirs(folder, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=folder, suffix=".part")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.state_file)
+
+    def used(self) -> int:
+        with self._lock:
+            return self._load()["used"]
+
+    def reserve(self, units: int):
+        """Claim units of today's quota, sleeping until the daily reset when they don't fit."""
+        if units > self.daily_limit:
+            raise ValueError(f"A single upload needs {units} quota units, more than the daily {self.daily_limit}")
+        while True:
+            with self._lock, file_lock(self.state_file):
+                state = self._load()
+                if state["used"] + units <= self.daily_limit:
+                    state["used"] += units
+                    self._save(state)
+                    return
+                wait = self._seconds_until_reset()
+            print(f"YouTube quota used up ({state['used']}/{self.daily_limit}), waiting {wait / 3600:.1f}h for the daily reset")
+            time.sleep(min(wait + 5, 3600))
+
+    def release(self, units: int):
+        """Give back reserved units that were not spent, e.g. by an upload that failed before reaching YouTube."""
+        with self._lock, file_lock(self.state_file):
+            state = self._load()
+            state["used"] = max(0, state["used"] - units)
+            self._save(state)
+
+class UploadService:
+    def __init__(self, uploader, concurrency: int = 2, quota: QuotaTracker | None = None):
+        """
+        Long-lived upload queue. The uploader is authenticated once and every
+        upload reuses its credentials and cached discovery document. At most
+        concurrency videos upload at the same time, however many threads call
+        upload(), and each reserves its quota units before it starts.
+
+        Args:
+            uploader: YouTubeUploader (or LocalYouTubeUploader) to authenticate and share.
+            concurrency (int): Uploads running at the same time.
+            quota (QuotaTracker, optional): Daily quota bookkeeping; a default tracker when None.
+        """
+        self.uploader = uploader
+        self.uploader.authenticate()
+        self.quota = quota or QuotaTracker()
+        self._slots = threading.Semaphore(concurrency)
+
+    def upload(self, video_file: str, **metadata) -> dict:
+        """
+        Upload a video on the calling thread once a slot and its quota are free. Returns the API response.
+
+        videos.insert is charged when the upload session is opened, so resuming a
+        saved session reserves only the playlist calls, and a failed upload gives
+        back the units it did not spend.
+        """
+        playlist_cost = 0
+        if metadata.get("playlist_id") or metadata.get("playlist_title"):
+            playlist_cost += QUOTA_COSTS["playlistItems.insert"]
+        if metadata.get("playlist_title") and not metadata.get("playlist_id"):
+            playlist_cost += QUOTA_COSTS["playlists.insert"]
+        uploader = self.uploader.for_video(video_file)
+        session_file = getattr(uploader, "session_file", None)
+        resuming = session_file is not None and os.path.exists(session_file)
+        cost = playlist_cost + (0 if resuming else QUOTA_COSTS["videos.insert"])
+        with self._slots:
+            self.quota.reserve(cost)
+            print(f"Uploading {video_file} (quota used today: {self.quota.used()}/{self.quota.daily_limit})")
+            try:
+                return uploader.upload_video(**metadata)
+            except Exception:
+                if getattr(uploader, "metrics", None):
+                    unspent = 0  # the video is up; the playlist calls after it may have run
+                elif resuming or (session_file is not None and os.path.exists(session_file)):
+                    unspent = playlist_cost  # the session was paid for; the playlist calls never ran
+                else:
+                    unspent = cost  # failed before a session was opened: nothing was charged
+                if unspent:
+                    self.quota.release(unspent)
+                raise
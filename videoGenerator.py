@@ -2,19 +2,55 @@ import ffmpeg
 import random
 import subprocess
 import os
-import whisper
+from captionRenderer import CaptionRenderer
+from questionCard import QuestionCard
+from profiler import stage
+from renderProfiles import RenderProfile, get_profile
+from modelRegistry import shared_registry
+from transcription import WhisperTranscriber, register_transcriber
 
 class VideoProcessor:
-    def __init__(self, video_file: str, audio_file: str, output_file: str = "processed_video.mp4", question: str = ""):
+    def __init__(self, video_file: str, audio_file: str, output_file: str = "processed_video.mp4", question: str = "", whisper_model=None, work_dir: str | None = None, script: str | None = None, aligner=None, words: list | None = None, templates=None, audio_duration: float | None = None, loop_template: bool = False, profile: RenderProfile | str | None = None, transcriber=None, question_cards: QuestionCard | None = None, question_seconds: float | None = None):
         self.video_file = video_file
         self.audio_file = audio_file
         self.output_file = output_file
-        self.video_duration = self._get_duration(video_file)
-        self.audio_duration = self._get_duration(audio_file)
+        # A TemplateLibrary supplies the template's metadata and keyframes without probing it again
+        self.templates = templates
+        self.template_info = templates.get(video_file) if templates is not None else None
+        self.video_duration = self.template_info["duration"] if self.template_info else self._get_duration(video_file)
+        self.audio_duration = audio_duration if audio_duration is not None else self._get_duration(audio_file)
+        # Narration longer than the template either fails fast or, with loop_template,
+        # plays the template footage back to back until the narration ends
+        self.loop_template = loop_template and self.audio_duration > self.video_duration
         self.question = question
-        self.trimmed_video = "trimmed_temp.mp4"  
-        self.srt_file = "captions.srt" 
-        self.whisper_model = whisper.load_model("base")
+        self.question_template = "redditQuestionTemplate.png"  # card the question is drawn on
+        # the question is drawn on the card once and cached; None shows it for the whole clip
+        self.question_cards = question_cards or QuestionCard()
+        self.question_seconds = question_seconds
+        # encoder settings and output size/frame rate; by name, or this host's autotuned default
+        self.profile = profile if isinstance(profile, RenderProfile) else get_profile(profile)
+        # Intermediates live in work_dir (default: next to the output) and carry the
+        # output's name, so several processors can run side by side in one folder.
+        scratch = work_dir or os.path.dirname(os.path.abspath(output_file))
+        stem = os.path.splitext(os.path.basename(output_file))[0]
+        self.trimmed_video = os.path.join(scratch, f"{stem}.trimmed_temp.mp4")
+        self.srt_file = os.path.join(scratch, f"{stem}.captions.srt")
+        self.overlay_temp = os.path.join(scratch, f"{stem}.text_overlay_temp.mp4")
+        self.audio_temp = os.path.join(scratch, f"{stem}.temp_output_with_audio.mp4")
+        self.ass_file = os.path.join(scratch, f"{stem}.captions.ass")
+        # AAC narration is muxed as-is instead of being re-encoded
+        self.audio_codec = "copy" if audio_file.lower().endswith((".m4a", ".aac")) else "aac"
+        self.captions = None  # [{"start", "end", "text"}, ...] filled by generate_captions()
+        self.caption_renderer = CaptionRenderer()
+        # With a script and a ForcedAligner the known words are aligned to the audio;
+        # the transcriber (configured backend, loaded on first use and shared through
+        # the model registry) is only needed when there is nothing to align. A Whisper
+        # model size, or a bare loaded Whisper model, is still accepted.
+        self.script = script
+        self.aligner = aligner
+        self.whisper_model = whisper_model if isinstance(whisper_model, str) else None
+        self.transcriber = transcriber or (WhisperTranscriber(whisper_model) if whisper_model is not None and self.whisper_model is None else None)
+        self.words = words  # per-segment word timings; reused instead of transcribing when given
 
     def _get_duration(self, filename: str) -> float:
         """Return media duration in seconds using ffprobe."""
@@ -27,40 +63,60 @@ class VideoProcessor:
         )
         return float(result.stdout)
 
-    def trim(self, random_start: bool = True, start_time: float = 0.0):
-        """Trim the video to match audio duration."""
+    def _pick_start(self, random_start: bool, start_time: float, seed=None) -> float:
+        """
+        Return the template offset to cut from, checking the audio fits. A seed makes
+        the random pick repeatable; with a template library it lands on a keyframe.
+        """
+        if self.loop_template:
+            print(f"Audio ({self.audio_duration:.2f}s) is longer than {self.video_file} ({self.video_duration:.2f}s), looping the template")
+            return 0.0
         if self.audio_duration > self.video_duration:
             raise ValueError("Audio file is longer than video!")
 
+        if random_start and self.templates is not None:
+            return self.templates.pick_window(self.video_file, self.audio_duration, seed)
         if random_start:
             max_start = self.video_duration - self.audio_duration
-            start_time = random.uniform(0, max_start)
+            start_time = random.Random(seed).uniform(0, max_start) if seed is not None else random.uniform(0, max_start)
+        return start_time
+
+    def _template_input(self, start_time: float):
+        """ffmpeg input for the template window, repeating the footage when it has to loop."""
+        if self.loop_template:
+            return ffmpeg.input(self.video_file, stream_loop=-1, ss=start_time, t=self.audio_duration)
+        return ffmpeg.input(self.video_file, ss=start_time, t=self.audio_duration)
+
+    def trim(self, random_start: bool = True, start_time: float = 0.0, seed=None):
+        """Trim the video to match audio duration."""
+        start_time = self._pick_start(random_start, start_time, seed)
 
         end_time = start_time + self.audio_duration
         print(f"Trimming video from {start_time:.2f}s to {end_time:.2f}s")
 
-        (
-            ffmpeg
-            .input(self.video_file, ss=start_time, t=self.audio_duration)
-            .output(self.trimmed_video, c="copy")
-            .run(overwrite_output=True)
-        )
+        with stage("ffmpeg.trim"):
+            (
+                self._template_input(start_time)
+                .output(self.trimmed_video, c="copy")
+                .run(overwrite_output=True)
+            )
         print(f"Trimmed video saved as {self.trimmed_video}")
 
     def attach_audio(self):
         """Attach the audio file to the captioned video."""
-        temp_output = "temp_output_with_audio.mp4" 
+        temp_output = self.audio_temp
         print(f"Attaching audio {self.audio_file} to video {self.output_file}")
         video = ffmpeg.input(self.output_file) 
         audio = ffmpeg.input(self.audio_file)
 
-        ffmpeg.output(
-            video['v'], audio['a'],
-            temp_output,
-            vcodec="copy",
-            acodec="aac",
-            strict="-2"
-        ).run(overwrite_output=True)
+        with stage("ffmpeg.attach_audio"):
+            ffmpeg.output(
+                video['v'], audio['a'],
+                temp_output,
+                vcodec="copy",
+                acodec=self.audio_codec,
+                strict="-2"
+            ).run(overwrite_output=True)
 
         if os.path.exists(temp_output):
             os.replace(temp_output, self.output_file)
@@ -76,143 +132,124 @@ class VideoProcessor:
         millis = int((seconds - int(seconds)) * 1000)
         return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
 
-    def generate_srt_captions(self):
-        """Generate an SRT file from the audio clip with a maximum of 3 words per caption."""
-        print(f"Transcribing audio {self.audio_file} using Whisper (base)...")
-        result = self.whisper_model.transcribe(self.audio_file, word_timestamps=True)
-        segments = result.get("segments", [])
-
-        with open(self.srt_file, 'w', encoding='utf-8') as f:
-            caption_index = 1
-            for seg in segments:
-                words = seg.get("words", [])
-                if not words:
-                    continue
+    def _get_resolution(self, filename: str) -> tuple:
+        """Return (width, height) of the first video stream using ffprobe."""
+        result = subprocess.run(
+            [
+                "ffprobe", "-v", "error", "-select_streams", "v:0",
+                "-show_entries", "stream=width,height", "-of", "csv=s=x:p=0", filename
+            ],
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT
+        )
+        width, height = result.stdout.decode().strip().split("x")[:2]
+        return int(width), int(height)
 
-                max_words_per_caption = 3
-                chunks = [words[i:i + max_words_per_caption] for i in range(0, len(words), max_words_per_caption)]
+    def _transcribe_words(self) -> list:
+        """Return per-segment word timings, aligning the script when one is known."""
+        if self.words is not None:
+            return self.words
 
-                for chunk in chunks:
-                    start_time = chunk[0]['start']
-                    end_time = chunk[-1]['end']
-                    text = " ".join(word['word'].strip() for word in chunk)
+        if self.script and self.aligner is not None:
+            print(f"Aligning script to audio {self.audio_file}...")
+            try:
+                with stage("align"):
+                    self.words = [self.aligner.align(self.audio_file, self.script)]
+                return self.words
+            except Exception as e:
+                print(f"Forced alignment failed ({e}), falling back to transcription")
+
+        if self.transcriber is None:
+            registry = shared_registry()
+            backend = "whisper" if self.whisper_model else None
+            self.transcriber = registry.get(register_transcriber(registry, backend, self.whisper_model))
+        name = f"{self.transcriber.name} ({self.transcriber.model_size})"
+        print(f"Transcribing audio {self.audio_file} using {name}...")
+        with stage("transcribe", backend=name):
+            self.words = self.transcriber.transcribe(self.audio_file)
+        return self.words
+
+    def generate_captions(self, max_words_per_caption: int = 3) -> list:
+        """Build in-memory captions of at most 3 words from the audio clip."""
+        self.captions = []
+        for words in self._transcribe_words():
+            if not words:
+                continue
 
-                    start_str = self._format_time_srt(start_time)
-                    end_str = self._format_time_srt(end_time)
+            chunks = [words[i:i + max_words_per_caption] for i in range(0, len(words), max_words_per_caption)]
 
-                    f.write(f"{caption_index}\n")
-                    f.write(f"{start_str} --> {end_str}\n")
-                    f.write(f"{text}\n\n")
-                    print(f"Added SRT caption {caption_index}: {text} ({start_str} to {end_str})")
-                    caption_index += 1
+            for chunk in chunks:
+                caption = {
+                    "start": chunk[0]['start'],
+                    "end": chunk[-1]['end'],
+                    "text": " ".join(word['word'].strip() for word in chunk)
+                }
+                self.captions.append(caption)
+                print(f"Added caption {len(self.captions)}: {caption['text']} ({caption['start']:.2f}s to {caption['end']:.2f}s)")
+        return self.captions
 
+    def write_srt(self):
+        """Export the in-memory captions as an SRT file."""
+        with open(self.srt_file, 'w', encoding='utf-8') as f:
+            for caption_index, caption in enumerate(self.captions, 1):
+                start_str = self._format_time_srt(caption["start"])
+                end_str = self._format_time_srt(caption["end"])
+                f.write(f"{caption_index}\n")
+                f.write(f"{start_str} --> {end_str}\n")
+                f.write(f"{caption['text']}\n\n")
         print(f"SRT captions saved to {self.srt_file}")
 
-    def add_text_overlays(self):
-        """Add text overlays and image with question to the video using ffmpeg drawtext and overlay filters."""
-        if not os.path.exists(self.srt_file):
-            raise FileNotFoundError(f"SRT file not found: {self.srt_file}. Generate captions first.")
-
-        temp_output = "text_overlay_temp.mp4"
-        print(f"Adding text overlays and image with question from {self.srt_file} to {self.trimmed_video}")
-
-        video_duration = self._get_duration(self.trimmed_video)
-
-        video_stream = ffmpeg.input(self.trimmed_video)['v']
-        image_stream = ffmpeg.input('redditQuestionTemplate.png')['v']
-
-        # Split question into lines with max 15 characters
-        if self.question:
-            words = self.question.split()
-            lines = []
-            current_line = ""
-            for word in words:
-                # Add word with a space if it's not the first word
-                test_line = f"{current_line} {word}" if current_line else word
-                if len(test_line) <= 15:
-                    current_line = test_line
-                else:
-                    if current_line:
-                        lines.append(current_line)
-                    current_line = word
-            if current_line:
-                lines.append(current_line)
-            question_text = '\n'.join(lines)
-        else:
-            question_text = ""
-
-        if self.question:
-            image_with_text = ffmpeg.filter(
-                [image_stream],
-                'drawtext',
-                text=question_text,
-                fontsize=60,
-                x='(w-text_w)/2',
-                y='(h-text_h)/2',
-                enable=f'between(t,0,{video_duration})',
-                fontcolor='black@1.0',
-                borderw=2,
-                bordercolor='white@1.0',
-                fontfile=r'verdana.ttf',
-                text_align='center'
-            )
-            print(f"Applied question text '{question_text}' to image")
+    def generate_srt_captions(self):
+        """Generate captions from the audio clip and save them as an SRT file."""
+        self.generate_captions()
+        self.write_srt()
+
+    def _compose_overlays(self, video_stream, video_duration: float):
+        """Build the filter graph that puts the question card and the captions on video_stream."""
+        if self.captions is None:
+            raise ValueError("No captions available. Generate captions first.")
+
+        card = self.question_cards.path(self.question, self.question_template) if self.question else self.question_template
+        if self.question_seconds is None or self.question_seconds >= video_duration:
+            # one still frame, repeated by overlay: no per-frame text drawing or enable expression
+            overlaid_stream = ffmpeg.filter([video_stream, ffmpeg.input(card)['v']], 'overlay', x=0, y=0)
+            print(f"Applied question card overlay for the whole {video_duration:.1f} seconds")
         else:
-            image_with_text = image_stream
-
-        overlaid_stream = ffmpeg.filter(
-            [video_stream, image_with_text],
-            'overlay',
-            x=0,
-            y=0,
-            enable=f'between(t,0,{video_duration})'
-        )
-        print(f"Applied image overlay with question at top for {video_duration} seconds")
+            # the card ends after its window and overlay passes the video through from then on
+            image_stream = ffmpeg.input(card, loop=1, t=self.question_seconds)['v']
+            overlaid_stream = ffmpeg.filter([video_stream, image_stream], 'overlay', x=0, y=0, eof_action='pass')
+            print(f"Applied question card overlay for the first {self.question_seconds:.1f} seconds")
 
-        with open(self.srt_file, 'r', encoding='utf-8') as f:
-            srt_content = f.read().split('\n\n')
+        if not self.captions:
+            print("No captions to burn in")
+            return overlaid_stream
 
-        current_stream = overlaid_stream
+        if self.template_info:
+            width, height = self.template_info["width"], self.template_info["height"]
+        else:
+            width, height = self._get_resolution(self.video_file)
+        self.caption_renderer.write_ass(self.captions, self.ass_file, width, height)
+        current_stream = self.caption_renderer.apply(overlaid_stream, self.ass_file)
+        print(f"Applied {len(self.captions)} captions with a single ass filter")
 
-        for i, block in enumerate(srt_content, 1):
-            if not block.strip():
-                continue
-            lines = block.strip().split('\n')
-            if len(lines) < 3:
-                continue
-            index, times, text = lines[0], lines[1], lines[2]
+        return current_stream
 
-            try:
-                start_time, end_time = times.split(' --> ')
-                start_hours, start_mins, start_secs = map(float, start_time.replace(',', '.').split(':'))
-                end_hours, end_mins, end_secs = map(float, end_time.replace(',', '.').split(':'))
-                start_seconds = start_hours * 3600 + start_mins * 60 + start_secs
-                end_seconds = end_hours * 3600 + end_mins * 60 + end_secs
-            except ValueError as e:
-                print(f"Error parsing timestamps for caption {i}: {e}")
-                continue
+    def add_text_overlays(self):
+        """Add the caption track and image with question to the video using ffmpeg ass and overlay filters."""
+        temp_output = self.overlay_temp
+        print(f"Adding captions and image with question to {self.trimmed_video}")
 
-            current_stream = ffmpeg.filter(
-                [current_stream],
-                'drawtext',
-                text=text,
-                fontsize=100,
-                x='(w-text_w)/2',
-                y='20+((h-text_h)/2)',
-                enable=f'between(t,{start_seconds},{end_seconds})',
-                fontcolor='white@1.0',
-                borderw=4,
-                bordercolor='black@1.0',
-                fontfile=r'bangers.ttf'
-            )
-            print(f"Filter for caption {i}: drawtext with text='{text}', start={start_seconds}, end={end_seconds}")
+        # a keyframe-aligned cut is exactly as long as the audio; otherwise measure it
+        video_duration = self.audio_duration if self.templates is not None else self._get_duration(self.trimmed_video)
+        video_stream = ffmpeg.input(self.trimmed_video)['v']
+        current_stream = self._compose_overlays(video_stream, video_duration)
 
         try:
-            (
-                current_stream
-                .output(temp_output, vcodec="libx264")
-                .run(overwrite_output=True)
-            )
+            with stage("ffmpeg.overlay"):
+                (
+                    self.profile.apply(current_stream)
+                    .output(temp_output, **self.profile.output_args())
+                    .run(overwrite_output=True)
+                )
         except ffmpeg.Error as e:
             print(f"ffmpeg error: {e.stderr.decode() if e.stderr else 'No stderr available'}")
             raise
@@ -220,17 +257,50 @@ class VideoProcessor:
         os.replace(temp_output, self.output_file)
         print(f"Captioned video with image and question saved as {self.output_file}")
 
-    def process_video(self, random_start: bool = True):
-        """Full workflow: trim, generate captions, add text overlays, then attach audio."""
-        self.trim(random_start=random_start)
-        self.generate_srt_captions()
-        self.add_text_overlays()
-        self.attach_audio()
+    def render(self, random_start: bool = True, start_time: float = 0.0, seed=None):
+        """
+        Single ffmpeg pass: seek into the template, overlay the question card,
+        burn in the captions and mux the narration straight into the output.
+        Decoding from the seek point keeps the cut frame-accurate, unlike the
+        stream-copy trim which snaps to the nearest keyframe.
+        """
+        start_time = self._pick_start(random_start, start_time, seed)
+        print(f"Rendering {self.video_file} from {start_time:.2f}s to {start_time + self.audio_duration:.2f}s in one pass ({self.profile.name} profile)")
+
+        video_stream = self._template_input(start_time)['v']
+        audio_stream = ffmpeg.input(self.audio_file)['a']
+        current_stream = self.profile.apply(self._compose_overlays(video_stream, self.audio_duration))
+
+        try:
+            with stage("ffmpeg.render", seconds=self.audio_duration):
+                (
+                    ffmpeg
+                    .output(current_stream, audio_stream, self.output_file, acodec=self.audio_codec, **self.profile.output_args())
+                    .run(overwrite_output=True)
+                )
+        except ffmpeg.Error as e:
+            print(f"ffmpeg error: {e.stderr.decode() if e.stderr else 'No stderr available'}")
+            raise
+        print(f"Final video with captions, question and audio saved as {self.output_file}")
+
+    def process_video(self, random_start: bool = True, single_pass: bool = True, seed=None):
+        """
+        Full workflow: generate captions and render in one ffmpeg pass.
+        With single_pass=False the legacy trim → overlay → attach audio chain is used.
+        """
+        if single_pass:
+            self.generate_captions()
+            self.render(random_start=random_start, seed=seed)
+        else:
+            self.trim(random_start=random_start, seed=seed)
+            self.generate_captions()
+            self.add_text_overlays()
+            self.attach_audio()
         self.cleanup()
 
     def cleanup(self):
         """Remove temporary files except for the final output."""
-        temp_files = [self.trimmed_video, self.srt_file, "text_overlay_temp.mp4", "temp_output_with_audio.mp4"]
+        temp_files = [self.trimmed_video, self.srt_file, self.ass_file, self.overlay_temp, self.audio_temp]
         for file in temp_files:
             if os.path.exists(file) and file != self.output_file:
                 os.remove(file)
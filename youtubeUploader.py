@@ -1,31 +1,52 @@
 import os
+import copy
+import json
+import uuid
+import shutil
+import threading
+import urllib.request
+import httplib2
+import google_auth_httplib2
 import google_auth_oauthlib.flow
 import googleapiclient.discovery
+import googleapiclient.discovery_cache
 import googleapiclient.errors
-from googleapiclient.http import MediaFileUpload
 from dotenv import load_dotenv
 from google.oauth2.credentials import Credentials
+from google.auth.transport.requests import Request
+from resumableUpload import ResumableUpload
 
 class YouTubeUploader:
-    def __init__(self, env_file: str, video_file: str):
+    def __init__(self, env_file: str, video_file: str, session_file: str | None = None):
         """
         Initialize the YouTubeUploader with .env file path and video file path.
         
         Args:
             env_file (str): Path to the .env file containing OAuth credentials.
             video_file (str): Path to the video file to upload.
+            session_file (str, optional): Where the resumable upload session is kept
+                between runs. Defaults to a file next to the video.
         """
         self.env_file = env_file
         self.video_file = video_file
+        self.session_file = session_file or f"{video_file}.upload.json"
         self.youtube = None
+        self.creds = None
+        self.metrics = {}
         self.scopes = ["https://www.googleapis.com/auth/youtube.upload", "https://www.googleapis.com/auth/youtube"]
         self.token_file = "token.json"  # File to store OAuth credentials
+        self.discovery_file = ".cache/youtube.v3.json"  # Local copy of the API's discovery document
+        self._local = threading.local()  # per-thread API clients, shared by for_video() copies
+        self._refresh_lock = threading.Lock()
         
         # Load environment variables from .env file
         load_dotenv(self.env_file)
         self.client_id = os.getenv("CLIENT_ID")
         self.client_secret = os.getenv("CLIENT_SECRET")
         self.redirect_uri = os.getenv("REDIRECT_URI", "urn:ietf:wg:oauth:2.0:oob")
+        # the upload endpoint can be pointed at a local fake server for testing
+        self.upload_url = os.getenv("YOUTUBE_UPLOAD_URL") or "https://www.googleapis.com/upload/youtube/v3/videos"
+        self.chunk_size = int(float(os.getenv("UPLOAD_CHUNK_MB") or 8) * 1024 * 1024)
 
     def authenticate(self):
         """
@@ -41,7 +62,6 @@ class YouTubeUploader:
             creds = Credentials.from_authorized_user_file(self.token_file, self.scopes)
         
         # If no valid credentials or token expired, refresh or authenticate
-        from google.auth.transport.requests import Request
         if not creds or not creds.valid:
             if creds and creds.expired and creds.refresh_token:
                 creds.refresh(Request())
@@ -63,7 +83,57 @@ class YouTubeUploader:
             with open(self.token_file, 'w') as token:
                 token.write(creds.to_json())
 
-        self.youtube = googleapiclient.discovery.build("youtube", "v3", credentials=creds)
+        self.creds = creds
+        self.youtube = self._thread_client()
+
+    def _discovery_document(self) -> str:
+        """The YouTube v3 discovery document, read from a local copy after the first run."""
+        if os.path.exists(self.discovery_file):
+            with open(self.discovery_file, "r", encoding="utf-8") as f:
+                return f.read()
+        document = googleapiclient.discovery_cache.get_static_doc("youtube", "v3")
+        if document is None:
+            with urllib.request.urlopen("https://www.googleapis.com/discovery/v1/apis/youtube/v3/rest") as response:
+                document = response.read().decode("utf-8")
+        os.makedirs(os.path.dirname(self.discovery_file), exist_ok=True)
+        with open(self.discovery_file, "w", encoding="utf-8") as f:
+            f.write(document)
+        return document
+
+    def _thread_client(self):
+        """
+        API client of the calling thread. httplib2 connections are not thread-safe,
+        so every thread gets its own, all sharing one set of credentials.
+        """
+        client = getattr(self._local, "youtube", None)
+        if client is None:
+            http = google_auth_httplib2.AuthorizedHttp(self.creds, http=httplib2.Http())
+            client = googleapiclient.discovery.build_from_document(self._discovery_document(), http=http)
+            self._local.youtube = client
+        return client
+
+    def for_video(self, video_file: str, session_file: str | None = None):
+        """
+        Uploader for another video that reuses this one's credentials and the
+        calling thread's API client, so nothing is re-read or rebuilt.
+        """
+        if not self.creds:
+            raise ValueError("Authentication required. Call authenticate() first.")
+        uploader = copy.copy(self)
+        uploader.video_file = video_file
+        uploader.session_file = session_file or f"{video_file}.upload.json"
+        uploader.metrics = {}
+        uploader.youtube = self._thread_client()
+        return uploader
+
+    def _auth_headers(self) -> dict:
+        """Authorization headers for a raw upload request, refreshing the token when it expired."""
+        with self._refresh_lock:
+            if not self.creds.valid:
+                self.creds.refresh(Request())
+        headers = {}
+        self.creds.apply(headers)
+        return headers
 
     def upload_video(self, title: str, description: str = "", tags: list = None, category_id: str = "22", privacy_status: str = "private", playlist_title: str = None, playlist_id: str = None):
         """
@@ -100,20 +170,17 @@ class YouTubeUploader:
             }
         }
 
-        # Create a media file upload object
-        media = MediaFileUpload(self.video_file, chunksize=-1, resumable=True)
-
         try:
-            request = self.youtube.videos().insert(
-                part="snippet,status",
-                body=body,
-                media_body=media
+            # resumable upload whose session survives a crash or restart of this worker
+            upload = ResumableUpload(
+                self.video_file,
+                self.session_file,
+                upload_url=self.upload_url,
+                auth_headers=self._auth_headers,
+                chunk_size=self.chunk_size
             )
-            response = None
-            while response is None:
-                status, response = request.next_chunk()
-                if status:
-                    print(f"Uploaded {int(status.progress() * 100)}%")
+            response = upload.upload(body, {"part": "snippet,status"})
+            self.metrics = upload.metrics
             print("Upload completed successfully!")
             video_id = response["id"]
 
@@ -159,4 +226,45 @@ class YouTubeUploader:
             raise
         except Exception as e:
             print(f"An error occurred: {e}")
-            raise
\ No newline at end of file
+            raise
+
+class LocalYouTubeUploader:
+    def __init__(self, env_file: str = ".env", video_file: str = "", output_dir: str = "uploads"):
+        """
+        Offline stand-in for YouTubeUploader: "uploads" by copying the video into
+        output_dir and writing its metadata next to it.
+
+        Args:
+            env_file (str): Ignored, kept for a matching signature.
+            video_file (str): Path to the video file to upload.
+            output_dir (str): Folder the videos are copied to.
+        """
+        self.video_file = video_file
+        self.output_dir = output_dir
+
+    def authenticate(self):
+        pass
+
+    def for_video(self, video_file: str, session_file: str | None = None):
+        uploader = copy.copy(self)
+        uploader.video_file = video_file
+        return uploader
+
+    def upload_video(self, title: str, description: str = "", tags: list = None, category_id: str = "22", privacy_status: str = "private", playlist_title: str = None, playlist_id: str = None):
+        """Copy the video to output_dir and return a response shaped like the API's."""
+        if not os.path.exists(self.video_file):
+            raise FileNotFoundError(f"Video file not found: {self.video_file}")
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        video_id = f"local-{uuid.uuid4().hex[:11]}"
+        shutil.copyfile(self.video_file, os.path.join(self.output_dir, f"{video_id}.mp4"))
+        response = {
+            "id": video_id,
+            "snippet": {"title": title, "description": description, "tags": tags or [], "categoryId": category_id},
+            "status": {"privacyStatus": privacy_status},
+            "playlistId": playlist_id
+        }
+        with open(os.path.join(self.output_dir, f"{video_id}.json"), "w", encoding="utf-8") as f:
+            json.dump(response, f, indent=2)
+        print(f"Local upload saved as {video_id}")
+        return response